@@ -0,0 +1,219 @@
+import datetime
+import json
+import math
+from collections import defaultdict
+
+import numpy as np
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app import config
+from app.models import User, EmissionRollup, IndustrySketch
+from app.months import month_label
+
+# 업종 벤치마크: (업종, 월, 지표)마다 사용자 월 배출량의 분위수 스케치를 들고 있다.
+# 롤업이 바뀔 때 바뀐 사용자/달의 옛 값을 빼고 새 값을 더하므로 전체 기록을 다시 훑지 않는다.
+# 백분위 조회 비용은 버킷 수(값의 범위와 alpha로 정해짐)에만 달려 있고 사용자 수와는 무관하다.
+
+METRICS = ("total", "scope1", "scope2")
+PERCENTILES = (10, 25, 50, 75, 90)
+_ROLLUP_COLUMNS = [EmissionRollup.total, EmissionRollup.scope1, EmissionRollup.scope2]
+
+
+class QuantileSketch:
+    """
+    로그 버킷 분위수 스케치. 값 x는 ceil(log_gamma(x)) 버킷에 세며 (gamma = (1+alpha)/(1-alpha)),
+    분위수 추정치의 상대 오차는 alpha 이하다. 같은 alpha끼리는 버킷별 덧셈/뺄셈으로 합치거나 뺄 수 있다.
+    """
+
+    def __init__(self, alpha: float, bins: dict = None, zeros: int = 0):
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {int(k): v for k, v in (bins or {}).items()}
+        self.zeros = zeros
+
+    @property
+    def count(self) -> int:
+        return self.zeros + sum(self.bins.values())
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float, n: int = 1):
+        """n < 0이면 뺀다 (이전에 더한 값을 되돌릴 때)."""
+        if value <= 0:
+            self.zeros += n
+            return
+        i = self._index(value)
+        left = self.bins.get(i, 0) + n
+        if left:
+            self.bins[i] = left
+        else:
+            self.bins.pop(i, None)
+
+    def merge(self, other: "QuantileSketch"):
+        self.zeros += other.zeros
+        for i, n in other.bins.items():
+            self.bins[i] = self.bins.get(i, 0) + n
+
+    def _cumulative(self):
+        keys = np.array(sorted(self.bins), dtype="int64")
+        counts = np.array([self.bins[k] for k in keys], dtype="int64")
+        return keys, np.cumsum(counts) + self.zeros
+
+    def _value(self, index: int) -> float:
+        # 버킷 (gamma^(i-1), gamma^i] 의 대표값
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def quantiles(self, qs) -> list:
+        count = self.count
+        if count <= 0:
+            return [None] * len(qs)
+        keys, cum = self._cumulative()
+        out = []
+        for q in qs:
+            rank = q * (count - 1)
+            if rank < self.zeros:
+                out.append(0.0)
+                continue
+            out.append(self._value(int(keys[np.searchsorted(cum, rank, side="right")])))
+        return out
+
+    def percentile_rank(self, value: float) -> float:
+        """value보다 작은 값의 비율(같은 버킷은 절반으로 센다), 0~100"""
+        count = self.count
+        if count <= 0:
+            return None
+        if value <= 0:
+            return 50.0 * self.zeros / count
+        keys, cum = self._cumulative()
+        i = self._index(value)
+        pos = np.searchsorted(keys, i, side="left")
+        below = int(cum[pos - 1]) if pos > 0 else self.zeros
+        same = self.bins.get(i, 0)
+        return 100.0 * (below + 0.5 * same) / count
+
+    def dumps(self) -> str:
+        return json.dumps({str(k): v for k, v in self.bins.items()}, separators=(",", ":"))
+
+
+def _sketch(row=None) -> QuantileSketch:
+    if row is None:
+        return QuantileSketch(config.ANALYTICS_SKETCH_ALPHA)
+    return QuantileSketch(config.ANALYTICS_SKETCH_ALPHA, json.loads(row.bins), row.zeros)
+
+
+def _load(db, industry: str, months) -> dict:
+    rows = db.execute(
+        select(IndustrySketch.month, IndustrySketch.metric, IndustrySketch.zeros, IndustrySketch.bins)
+        .where(IndustrySketch.industry == industry, IndustrySketch.month.in_(list(months)))
+    ).all()
+    return {(r.month, r.metric): _sketch(r) for r in rows}
+
+
+def _store(db, industry: str, sketches: dict):
+    now = datetime.datetime.utcnow()
+    rows = [
+        {"industry": industry, "month": month, "metric": metric, "count": s.count,
+         "zeros": s.zeros, "bins": s.dumps(), "updated_at": now}
+        for (month, metric), s in sketches.items()
+    ]
+    if not rows:
+        return
+    stmt = insert(IndustrySketch)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["industry", "month", "metric"],
+        set_={c: stmt.excluded[c] for c in ("count", "zeros", "bins", "updated_at")},
+    ), rows)
+
+
+def user_monthly_values(db, user_id: int, since: int = None) -> dict:
+    """롤업의 {월: (total, scope1, scope2)}"""
+    stmt = select(EmissionRollup.month, *_ROLLUP_COLUMNS).where(EmissionRollup.user_id == user_id)
+    if since is not None:
+        stmt = stmt.where(EmissionRollup.month >= since)
+    return {r[0]: tuple(r[1:]) for r in db.execute(stmt)}
+
+
+def apply_rollup_change(db, user_id: int, before: dict, after: dict):
+    """사용자의 월 값이 before에서 after로 바뀐 만큼만 업종 스케치를 고친다 (커밋은 호출자가 한다)."""
+    months = [m for m in set(before) | set(after) if before.get(m) != after.get(m)]
+    if not months:
+        return
+    industry = db.execute(select(User.industry).where(User.id == user_id)).scalar()
+    if not industry:
+        return
+    sketches = _load(db, industry, months)
+    for month in months:
+        for i, metric in enumerate(METRICS):
+            sketch = sketches.setdefault((month, metric), _sketch())
+            if month in before:
+                sketch.add(before[month][i], -1)
+            if month in after:
+                sketch.add(after[month][i], 1)
+    _store(db, industry, sketches)
+
+
+def reset_sketches(db):
+    db.execute(delete(IndustrySketch))
+
+
+def rebuild_sketches(db):
+    """롤업 전체로 스케치를 다시 만든다 (migrations에서 호출, Connection도 받는다)."""
+    reset_sketches(db)
+    rows = db.execute(
+        select(User.industry, EmissionRollup.month, *_ROLLUP_COLUMNS)
+        .join(User, User.id == EmissionRollup.user_id)
+        .where(User.industry.is_not(None), User.industry != "")
+    )
+    by_industry = defaultdict(dict)
+    for industry, month, *values in rows:
+        for metric, value in zip(METRICS, values):
+            by_industry[industry].setdefault((month, metric), _sketch()).add(value)
+    for industry, sketches in by_industry.items():
+        _store(db, industry, sketches)
+
+
+def industry_benchmark(db: Session, user_id: int, start_month: int, end_month: int, metric: str = "total") -> dict:
+    """기간 안 각 달의 내 값, 업종 분위수, 업종 안 백분위. 비교 대상이 ANALYTICS_MIN_PEERS보다 적으면 분위수를 숨긴다."""
+    industry = db.execute(select(User.industry).where(User.id == user_id)).scalar()
+    mine = {
+        m: v[METRICS.index(metric)]
+        for m, v in user_monthly_values(db, user_id, start_month).items() if m <= end_month
+    }
+    rows = db.execute(
+        select(IndustrySketch.month, IndustrySketch.zeros, IndustrySketch.bins)
+        .where(IndustrySketch.industry == industry, IndustrySketch.metric == metric,
+               IndustrySketch.month.between(start_month, end_month))
+        .order_by(IndustrySketch.month)
+    ).all() if industry else []
+
+    months = []
+    for row in rows:
+        sketch = _sketch(row)
+        if sketch.count <= 0:
+            continue
+        value = mine.get(row.month)
+        entry = {"month": month_label(row.month), "value": None if value is None else round(value, 2),
+                 "peers": sketch.count}
+        if sketch.count >= config.ANALYTICS_MIN_PEERS:
+            quantiles = sketch.quantiles([p / 100 for p in PERCENTILES])
+            entry.update({f"p{p}": round(q, 2) for p, q in zip(PERCENTILES, quantiles)})
+            if value is not None:
+                entry["percentile"] = round(sketch.percentile_rank(value), 1)
+        months.append(entry)
+    ranks = [m["percentile"] for m in months if "percentile" in m]
+    return {
+        "industry": industry,
+        "metric": metric,
+        "months": months,
+        # 기간 평균 백분위 (낮을수록 업종 안에서 배출이 적다)
+        "average_percentile": round(sum(ranks) / len(ranks), 1) if ranks else None,
+    }
+
+
+def sketches_updated_at(db: Session, user_id: int):
+    """사용자 업종의 스케치가 마지막으로 바뀐 시각 (없으면 None)"""
+    industry = select(User.industry).where(User.id == user_id).scalar_subquery()
+    return db.scalar(select(func.max(IndustrySketch.updated_at)).where(IndustrySketch.industry == industry))
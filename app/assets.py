@@ -0,0 +1,239 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import stat
+import threading
+import time
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+# app/static 원본을 내용 해시가 붙은 파일명으로 ASSET_BUILD_DIR에 복사하고
+# 텍스트 자산은 gzip/brotli, 이미지는 축소 WebP/PNG 변형을 미리 만들어 둔다.
+# 결과는 manifest.json에 기록되고 템플릿은 asset_url()/asset_srcset()으로 주소를 얻는다.
+
+SOURCE_DIR = "app/static"
+URL_PREFIX = "/assets"
+MANIFEST = "manifest.json"
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".ttf", ".otf"}
+IMAGES = {".png", ".jpg", ".jpeg"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+try:
+    import brotli
+except ImportError:  # 선택 의존성: 없으면 gzip만 만든다
+    brotli = None
+
+
+def _digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:12]
+
+
+def _write_once(path: str, write):
+    """이미 있으면 건너뛴다 (파일명에 내용 해시가 있으므로 같은 이름이면 같은 내용)."""
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # 여러 워커가 동시에 빌드해도 서로의 임시 파일을 덮어쓰지 않게 한다
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _compress(path: str, outputs: set):
+    with open(path, "rb") as f:
+        data = f.read()
+
+    def write_gzip(tmp):
+        with open(tmp, "wb") as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+
+    _write_once(path + ".gz", write_gzip)
+    outputs.add(path + ".gz")
+    if brotli is not None:
+        def write_brotli(tmp):
+            with open(tmp, "wb") as f:
+                f.write(brotli.compress(data, quality=11))
+
+        _write_once(path + ".br", write_brotli)
+        outputs.add(path + ".br")
+
+
+def _image_variants(src: str, out_base: str, outputs: set) -> dict:
+    """원본보다 작은 ASSET_IMAGE_WIDTHS 너비마다 WebP/PNG를, 원본 크기로 WebP를 만든다."""
+    from PIL import Image
+
+    # 크기는 헤더만 읽으면 되고, 픽셀은 새로 만들 변형이 있을 때만 디코딩된다
+    with Image.open(src) as im:
+        width, height = im.size
+        widths = sorted({w for w in config.ASSET_IMAGE_WIDTHS if w < width} | {width})
+        variants = []
+        for w in widths:
+            h = max(1, round(height * w / width))
+            entry = {"width": w}
+            for fmt, ext in (("WEBP", "webp"), ("PNG", "png")):
+                if fmt == "PNG" and w == width:
+                    continue  # 원본 크기 PNG는 지문 붙은 원본을 쓴다
+                path = f"{out_base}.w{w}.{ext}"
+
+                def write(tmp, fmt=fmt, w=w, h=h):
+                    resized = im if w == width else im.resize((w, h), Image.LANCZOS)
+                    if fmt == "WEBP":
+                        resized.save(tmp, "WEBP", quality=config.ASSET_WEBP_QUALITY)
+                    else:
+                        resized.save(tmp, "PNG", optimize=True)
+
+                _write_once(path, write)
+                outputs.add(path)
+                entry[ext] = path
+            variants.append(entry)
+    return {"width": width, "height": height, "variants": variants}
+
+
+def build_assets(source_dir: str = SOURCE_DIR, build_dir: str = None) -> dict:
+    """원본이 바뀐 파일만 새로 만들고, 더는 쓰지 않는 결과물은 지운다. manifest를 돌려준다."""
+    build_dir = build_dir or config.ASSET_BUILD_DIR
+    manifest, outputs = {}, set()
+    for root, _, files in os.walk(source_dir):
+        for name in sorted(files):
+            src = os.path.join(root, name)
+            rel = os.path.relpath(src, source_dir).replace(os.sep, "/")
+            stem, ext = os.path.splitext(rel)
+            out_base = os.path.join(build_dir, f"{stem}.{_digest(src)}")
+            out = out_base + ext
+
+            _write_once(out, lambda tmp: shutil.copyfile(src, tmp))
+            outputs.add(out)
+            entry = {"path": os.path.relpath(out, build_dir).replace(os.sep, "/")}
+            if ext.lower() in COMPRESSIBLE:
+                _compress(out, outputs)
+            if ext.lower() in IMAGES:
+                info = _image_variants(src, out_base, outputs)
+                for v in info["variants"]:
+                    for key in ("webp", "png"):
+                        if key in v:
+                            v[key] = os.path.relpath(v[key], build_dir).replace(os.sep, "/")
+                entry.update(info)
+            manifest[rel] = entry
+
+    for root, _, files in os.walk(build_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if path not in outputs and name != MANIFEST and not name.endswith(".tmp"):
+                os.remove(path)
+
+    path = os.path.join(build_dir, MANIFEST)
+    os.makedirs(build_dir, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+    global _manifest
+    _manifest = manifest
+    return manifest
+
+
+_manifest = None
+
+
+def _load_manifest() -> dict:
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(os.path.join(config.ASSET_BUILD_DIR, MANIFEST), encoding="utf-8") as f:
+                _manifest = json.load(f)
+        except FileNotFoundError:
+            return {}
+    return _manifest
+
+
+def asset_url(path: str) -> str:
+    """지문이 붙은 /assets 주소. 빌드되지 않은 파일은 원래 /static 주소로 돌려준다."""
+    entry = _load_manifest().get(path)
+    if entry is None:
+        return f"/static/{path}"
+    return f"{URL_PREFIX}/{entry['path']}"
+
+
+def asset_srcset(path: str, fmt: str = "webp") -> str:
+    """이미지 변형들의 srcset 문자열 (fmt: webp | png)"""
+    entry = _load_manifest().get(path)
+    if entry is None or "variants" not in entry:
+        return ""
+    parts = []
+    for v in entry["variants"]:
+        url = f"{URL_PREFIX}/{v[fmt]}" if fmt in v else asset_url(path)
+        parts.append(f"{url} {v['width']}w")
+    return ", ".join(parts)
+
+
+def build_in_background(on_done=None):
+    """시작을 막지 않도록 작업 스레드에서 빌드한다. 끝나기 전까지 asset_url()은 /static 주소를 준다."""
+    def run():
+        try:
+            started = time.perf_counter()
+            manifest = build_assets()
+            logger.info("assets built: %d files in %.2fs", len(manifest), time.perf_counter() - started)
+        except Exception:
+            logger.exception("asset build failed")
+            return
+        if on_done is not None:
+            on_done()
+
+    threading.Thread(target=run, name="asset-build", daemon=True).start()
+
+
+def install_template_helpers(env):
+    env.globals["asset_url"] = asset_url
+    env.globals["asset_srcset"] = asset_srcset
+
+
+class AssetFiles(StaticFiles):
+    """지문 붙은 자산을 immutable로 내보내고, 클라이언트가 받으면 미리 압축해 둔 .br/.gz를 준다."""
+
+    async def get_response(self, path: str, scope):
+        request_headers = Headers(scope=scope)
+        accept = request_headers.get("accept-encoding", "")
+        response = None
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if encoding not in accept:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                continue
+            media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            response = FileResponse(full_path, stat_result=stat_result, media_type=media_type,
+                                    headers={"Content-Encoding": encoding})
+            if self.is_not_modified(response.headers, request_headers):
+                response = NotModifiedResponse(response.headers)
+            break
+        if response is None:
+            response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE
+            if os.path.splitext(path)[1].lower() in COMPRESSIBLE:
+                response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+if __name__ == "__main__":
+    # 배포 빌드 단계에서: python -m app.assets
+    logging.basicConfig(level=logging.INFO)
+    result = build_assets()
+    print(json.dumps({"files": len(result), "build_dir": config.ASSET_BUILD_DIR, "brotli": brotli is not None}))
@@ -0,0 +1,150 @@
+import datetime
+
+from sqlalchemy import select, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app import config
+from app.db import SessionLocal
+from app.models import EmissionRecord, EmissionRollup, ReportInfo, ReportBalance
+from app.matching import matching_engine, SURPLUS, DEFICIT
+from app.forecast import forecast_cache
+from app.rollup import cumulative_total_at
+from app.read_model import latest_report_info, user_industry
+
+UNKNOWN_COMPANY = "(미입력)"
+
+
+def _balance_select():
+    # 보고서별 기간 배출 합계 = 누적(end_month) - 누적(start_month 직전), 월 롤업에서 인덱스 조회 두 번
+    first_company = (
+        select(EmissionRecord.company)
+        .where(EmissionRecord.user_id == ReportInfo.user_id)
+        .order_by(EmissionRecord.id)
+        .limit(1)
+        .correlate(ReportInfo)
+        .scalar_subquery()
+    )
+    through_end = cumulative_total_at(ReportInfo.user_id, EmissionRollup.month <= ReportInfo.end_month)
+    before_start = cumulative_total_at(ReportInfo.user_id, EmissionRollup.month < ReportInfo.start_month)
+    emission_sum = func.coalesce(through_end, 0.0) - func.coalesce(before_start, 0.0)
+
+    return select(
+        ReportInfo.id.label("report_id"),
+        ReportInfo.user_id,
+        func.coalesce(func.nullif(ReportInfo.company, ""), first_company, UNKNOWN_COMPANY).label("company"),
+        ReportInfo.allowance,
+        emission_sum.label("emission_sum"),
+    )
+
+
+def compute_balances(db: Session, user_id: int = None):
+    stmt = _balance_select()
+    if user_id is not None:
+        stmt = stmt.where(ReportInfo.user_id == user_id)
+    return db.execute(stmt).all()
+
+
+def refresh_balances(db: Session, user_id: int = None):
+    """user_id의 보고서 잔여 배출권을 다시 계산해 report_balances에 반영한다 (커밋은 호출자가 한다)."""
+    db.flush()
+    now = datetime.datetime.utcnow()
+    rows = [
+        {
+            "report_id": r.report_id,
+            "user_id": r.user_id,
+            "company": r.company,
+            "allowance": r.allowance,
+            "emission_sum": round(r.emission_sum, 2),
+            "difference": round((r.allowance or 0) - r.emission_sum, 2),
+            "updated_at": now,
+        }
+        for r in compute_balances(db, user_id)
+    ]
+    if not rows:
+        return 0
+
+    stmt = insert(ReportBalance)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ReportBalance.report_id],
+        set_={
+            "user_id": stmt.excluded.user_id,
+            "company": stmt.excluded.company,
+            "allowance": stmt.excluded.allowance,
+            "emission_sum": stmt.excluded.emission_sum,
+            "difference": stmt.excluded.difference,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+    db.execute(stmt, rows)
+    return len(rows)
+
+
+def ensure_balances(db: Session):
+    # 기존 DB에는 report_balances가 비어 있을 수 있으므로 시작 시 한 번 채운다
+    reports = db.scalar(select(func.count()).select_from(ReportInfo))
+    balances = db.scalar(select(func.count()).select_from(ReportBalance))
+    if reports != balances:
+        db.query(ReportBalance).delete()
+        refresh_balances(db)
+        db.commit()
+
+
+def get_report_balance(db: Session, report_id: int):
+    """(company, difference) 또는 None"""
+    return db.execute(
+        select(ReportBalance.company, ReportBalance.difference).where(ReportBalance.report_id == report_id)
+    ).first()
+
+
+def matching_summary(db: Session, user_id: int, page: int = 1):
+    """매칭 화면/API 데이터. 보고서 정보가 없으면 None (잔여량을 새로 계산했으면 호출자가 커밋한다)."""
+    report = latest_report_info(db, user_id)
+    if report is None:
+        return None
+    balance = get_report_balance(db, report.id)
+    if balance is None:
+        refresh_balances(db, user_id)
+        balance = get_report_balance(db, report.id)
+    matching_engine.sync(db)
+
+    remaining = balance.difference
+    industry = user_industry(db, user_id)
+    size = config.MATCHING_PAGE_SIZE
+    offset = (max(page, 1) - 1) * size
+    excess, excess_total = matching_engine.counterparties(DEFICIT, industry, user_id, offset, size)
+    surplus, surplus_total = matching_engine.counterparties(SURPLUS, industry, user_id, offset, size)
+    recommendations = matching_engine.pairing(user_id)
+
+    # 화면에 나온 회사들의 기간 말 예상 잔여량을 한 번에 구한다
+    shown = excess + surplus + recommendations["pairs"]
+    forecasts = forecast_cache.get_many(db, [user_id] + [c["id"] for c in shown])
+    for c in shown:
+        forecast = forecasts.get(c["id"])
+        c["projected_difference"] = forecast["projected_balance"] if forecast else None
+        c["projected_through"] = forecast["projected_through"] if forecast and forecast["partial"] else None
+    return {
+        "user_company": balance.company,
+        "user_industry": industry,
+        "status": "남은 배출권" if remaining > 0 else "초과 배출량",
+        "status_value": abs(remaining),
+        # 내 부족분(여유분)을 채울 추천 상대와 배정량
+        "recommendations": recommendations,
+        # 기간 말 예상 총배출/잔여량과 예측 구간 (월 기록이 없으면 None)
+        "forecast": forecasts.get(user_id),
+        "excess_companies": excess,
+        "remaining_companies": surplus,
+        "page": max(page, 1),
+        "pages": max(1, -(-max(excess_total, surplus_total) // size)),
+        "excess_total": excess_total,
+        "remaining_total": surplus_total,
+    }
+
+
+def matching_summary_committed(user_id: int, page: int = 1):
+    """(작업 스레드) 동기 세션으로 matching_summary를 구하고 새로 계산한 잔여량이 있으면 커밋한다.
+    잔여량 동기화, 상대 목록 조회, 예측 적합이 이벤트 루프를 막지 않도록 asyncio.to_thread로 부른다."""
+    with SessionLocal() as db:
+        summary = matching_summary(db, user_id, page)
+        db.commit()
+    return summary
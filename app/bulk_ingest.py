@@ -0,0 +1,257 @@
+import asyncio
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import zipfile
+import zlib
+
+from fastapi import HTTPException, UploadFile
+from openpyxl import load_workbook
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import config
+from app.balance import refresh_balances
+from app.data_version import touch
+from app.db import SessionLocal
+from app.emissions import missing_columns, prepare_frame, save_frame
+from app.factors import FactorTable, get_factor_table
+from app.ingest import CHUNK_ROWS, earliest_month, iter_chunks, spool_upload
+from app.months import month_label
+from app.process_pool import ProcessPool
+from app.rollup import rebuild_rollup
+
+logger = logging.getLogger(__name__)
+
+# 여러 계열사 데이터를 한 번에 올린다.
+#  - ZIP: 안의 .xlsx/.csv 파일 하나가 회사 하나 (파일 이름 = 회사명)
+#  - 여러 시트가 있는 통합 문서: 시트 하나가 회사 하나 (시트 이름 = 회사명)
+# 시트 파싱/검증/배출량 계산은 프로세스 풀에서 병렬로 하고, 저장은 회사마다 한 트랜잭션으로 커밋한다.
+# 작업 프로세스는 계산한 청크를 임시 파일에 하나씩 pickle로 쓰고, 저장도 청크 단위로 읽어 가며 하므로
+# 시트가 커도 두 쪽 모두 한 번에 청크 하나 분량만 메모리에 든다.
+
+DATA_SUFFIXES = (".xlsx", ".xlsm", ".csv")
+
+_pool = ProcessPool(config.BULK_INGEST_PROCESSES, name="bulk ingest")
+
+
+def shutdown():
+    _pool.shutdown()
+
+
+def parse_company(path: str, sheet: str, table: FactorTable, out_path: str, chunk_rows: int = CHUNK_ROWS) -> dict:
+    """(작업 프로세스) 시트 하나를 청크 단위로 읽어 검증하고 배출량까지 계산해 out_path에 청크별로 쓴다."""
+    started = time.perf_counter()
+    rows = valid = 0
+    with open(out_path, "wb") as out:
+        for chunk in iter_chunks(path, chunk_rows, sheet):
+            if rows == 0:
+                missing = missing_columns(chunk)
+                if missing:
+                    return {"error": f"필수 컬럼이 없습니다: {', '.join(missing)}"}
+            rows += len(chunk)
+            df = table.compute(prepare_frame(chunk))
+            if not df.empty:
+                valid += len(df)
+                pickle.dump(df, out, protocol=pickle.HIGHEST_PROTOCOL)
+    if rows == 0:
+        return {"error": "빈 시트입니다."}
+    if valid == 0:
+        return {"error": "월을 해석할 수 있는 행이 없습니다."}
+    return {
+        "path": out_path,
+        "rows": rows,
+        # 월을 해석하지 못했거나 같은 청크 안에서 같은 달이 중복된 행
+        "skipped": rows - valid,
+        "parse_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def iter_parsed(path: str):
+    """parse_company가 쓴 계산된 청크를 하나씩 읽는다."""
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def _check_count(count: int):
+    if count == 0:
+        raise HTTPException(status_code=400, detail="처리할 시트나 파일이 없습니다.")
+    if count > config.BULK_MAX_COMPANIES:
+        raise HTTPException(
+            status_code=400, detail=f"한 번에 최대 {config.BULK_MAX_COMPANIES}개 회사까지 올릴 수 있습니다."
+        )
+
+
+def _company_name(name: str) -> str:
+    return os.path.splitext(os.path.basename(name))[0].strip()
+
+
+def _too_large(detail: str):
+    return HTTPException(status_code=400, detail=detail)
+
+
+def _extract(zf: zipfile.ZipFile, info: zipfile.ZipInfo, target: str, limit: int) -> int:
+    """압축을 풀며 실제로 쓴 바이트를 센다 (헤더의 file_size는 조작될 수 있다)."""
+    written = 0
+    with zf.open(info) as src, open(target, "wb") as out:
+        while True:
+            chunk = src.read(1024 * 1024)
+            if not chunk:
+                return written
+            written += len(chunk)
+            if written > limit:
+                raise _too_large(f"압축을 푼 크기가 너무 큽니다: {info.filename}")
+            out.write(chunk)
+
+
+def list_sources(path: str, workdir: str) -> list:
+    """업로드 파일을 [(회사명, 파일 경로, 시트 이름 또는 None)]으로 펼친다."""
+    if path.endswith(".zip"):
+        try:
+            zf = zipfile.ZipFile(path)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail="올바른 ZIP 파일이 아닙니다.")
+        with zf:
+            members = [
+                info for info in zf.infolist()
+                if not info.is_dir() and "__MACOSX" not in info.filename
+                and not os.path.basename(info.filename).startswith(".")
+                and info.filename.lower().endswith(DATA_SUFFIXES)
+            ]
+            _check_count(len(members))
+            # 풀기 전에 선언된 크기로 먼저 거른다
+            for info in members:
+                if info.file_size > config.BULK_MAX_FILE_BYTES:
+                    raise _too_large(f"파일이 너무 큽니다: {info.filename}")
+            if sum(info.file_size for info in members) > config.BULK_MAX_TOTAL_BYTES:
+                raise _too_large("압축을 푼 전체 크기가 너무 큽니다.")
+            sources, budget = [], config.BULK_MAX_TOTAL_BYTES
+            for i, info in enumerate(members):
+                # 압축 안의 경로는 믿지 않고 순번 + 확장자로만 풀어 놓는다
+                target = os.path.join(workdir, f"{i}{os.path.splitext(info.filename)[1].lower()}")
+                try:
+                    budget -= _extract(zf, info, target, min(config.BULK_MAX_FILE_BYTES, budget))
+                except (zipfile.BadZipFile, zlib.error, NotImplementedError) as e:
+                    raise HTTPException(status_code=400, detail=f"압축을 풀 수 없습니다: {info.filename} ({e})")
+                sources.append((_company_name(info.filename), target, None))
+        return sources
+    if not path.endswith((".xlsx", ".xlsm")):
+        raise HTTPException(status_code=400, detail="일괄 업로드는 ZIP 또는 엑셀 파일만 받습니다.")
+    try:
+        wb = load_workbook(path, read_only=True)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="올바른 엑셀 파일이 아닙니다.")
+    try:
+        names = wb.sheetnames
+    finally:
+        wb.close()
+    _check_count(len(names))
+    return [(name.strip(), path, name) for name in names]
+
+
+def save_company(db, user_id: int, company: str, chunks):
+    """회사 하나의 계산된 청크들을 저장하고 바뀐 달부터 롤업을 다시 만든다 (커밋은 호출자가 한다).
+    같은 달이 여러 청크에 나오면 뒤의 청크가 이긴다 (ingest_path와 같다)."""
+    written, since = 0, None
+    for df in chunks:
+        count, first_month = save_frame(db, user_id, company, df)
+        written += count
+        since = earliest_month(since, first_month)
+    if since is not None:
+        rebuild_rollup(db, user_id, since)
+        touch(db, user_id)
+    return written, since
+
+
+def _save_committed(user_id: int, company: str, parsed_path: str):
+    """(작업 스레드) 회사 하나를 동기 세션으로 저장하고 커밋한다."""
+    with SessionLocal() as db:
+        result = save_company(db, user_id, company, iter_parsed(parsed_path))
+        db.commit()
+    return result
+
+
+def _finish_committed(user_id: int):
+    with SessionLocal() as db:
+        refresh_balances(db, user_id)
+        touch(db, user_id)
+        db.commit()
+
+
+async def _store(user_id: int, company: str, parsed: dict) -> dict:
+    if "error" in parsed:
+        return {"company": company, "status": "error", "error": parsed["error"]}
+    try:
+        # 병합/upsert/롤업 재계산이 이벤트 루프를 막지 않도록 작업 스레드에서 한다 (실패하면 세션이 롤백한다)
+        written, since = await asyncio.to_thread(_save_committed, user_id, company, parsed["path"])
+    except Exception as e:
+        logger.exception("bulk ingest failed for company=%s", company)
+        return {"company": company, "status": "error", "error": f"저장 실패: {e}"}
+    return {
+        "company": company,
+        "status": "ok",
+        "rows": parsed["rows"],
+        "skipped": parsed["skipped"],
+        "written": written,
+        "changed_from": month_label(since) if since is not None else None,
+        "parse_seconds": parsed["parse_seconds"],
+    }
+
+
+async def ingest_bulk(db: AsyncSession, file: UploadFile, user_id: int) -> dict:
+    """업로드를 회사별로 나눠 처리하고 회사별 결과 목록을 돌려준다. 한 회사의 실패는 다른 회사에 영향을 주지 않는다."""
+    path = await spool_upload(file)
+    workdir = tempfile.mkdtemp(prefix="bulk-")
+    started = time.perf_counter()
+    try:
+        sources = await asyncio.to_thread(list_sources, path, workdir)
+
+        # 모든 작업 프로세스가 같은 계수표로 계산한다
+        table = await db.run_sync(get_factor_table)
+
+        async def parse(index, company, source, sheet):
+            out_path = os.path.join(workdir, f"{index}.parsed")
+            try:
+                # 작업 프로세스가 죽어 풀이 깨지면 풀을 새로 만들어 이 시트를 한 번 더 파싱한다
+                parsed = await _pool.run(parse_company, source, sheet, table, out_path)
+            except Exception as e:
+                logger.exception("bulk parse failed for company=%s", company)
+                parsed = {"error": f"파싱 실패: {e}"}
+            return index, company, parsed
+
+        results, pending, seen = {}, [], set()
+        for index, (company, source, sheet) in enumerate(sources):
+            if not company:
+                results[index] = {"company": company, "status": "error", "error": "회사명이 비어 있습니다."}
+            elif company in seen:
+                results[index] = {"company": company, "status": "error", "error": "같은 회사명이 이미 있습니다."}
+            else:
+                seen.add(company)
+                pending.append(parse(index, company, source, sheet))
+
+        # 먼저 파싱이 끝난 회사부터 저장해 파싱과 저장이 겹치게 한다
+        for next_done in asyncio.as_completed(pending):
+            index, company, parsed = await next_done
+            results[index] = await _store(user_id, company, parsed)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        os.remove(path)
+
+    companies = [results[i] for i in sorted(results)]
+    if any(r["status"] == "ok" and r["written"] for r in companies):
+        await asyncio.to_thread(_finish_committed, user_id)
+    summary = {
+        "companies": companies,
+        "succeeded": sum(1 for r in companies if r["status"] == "ok"),
+        "failed": sum(1 for r in companies if r["status"] == "error"),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info("bulk ingest user=%s companies=%d failed=%d in %.3fs",
+                user_id, len(companies), summary["failed"], summary["seconds"])
+    return summary
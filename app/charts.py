@@ -0,0 +1,80 @@
+from reportlab.graphics.shapes import Drawing, Group, String
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.lib import colors
+
+# matplotlib 기본 색상과 맞춘다
+TOTAL_COLOR = colors.HexColor("#1f77b4")
+SCOPE1_COLOR = colors.HexColor("#1f77b4")
+SCOPE2_COLOR = colors.HexColor("#ff7f0e")
+
+
+# x축에 이름을 적는 최대 칸 수. 기간이 길면 일정 간격으로만 적어 가로로 둔다
+MAX_LABELS = 12
+
+
+def _thin_labels(months, max_labels=MAX_LABELS):
+    step = max(1, -(-len(months) // max_labels))
+    return [m if i % step == 0 else "" for i, m in enumerate(months)]
+
+
+def _bar_chart(months, series, bar_colors, width, height, font_name):
+    chart = VerticalBarChart()
+    chart.x, chart.y = 55, 30
+    chart.width, chart.height = width - 75, height - 65
+    chart.data = [list(s) for s in series]
+    chart.barSpacing = 0
+    chart.groupSpacing = 4
+    chart.strokeColor = None
+    for i, color in enumerate(bar_colors):
+        chart.bars[i].fillColor = color
+        chart.bars[i].strokeColor = None
+
+    chart.categoryAxis.categoryNames = _thin_labels(list(months))
+    chart.categoryAxis.labels.boxAnchor = "n"
+    chart.categoryAxis.labels.dy = -2
+    # 칸이 많으면 눈금이 막대만큼 빽빽해지므로 그리지 않는다
+    chart.categoryAxis.visibleTicks = len(months) <= MAX_LABELS
+    chart.categoryAxis.labels.fontName = font_name
+    chart.categoryAxis.labels.fontSize = 6
+
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontName = font_name
+    chart.valueAxis.labels.fontSize = 6
+    chart.valueAxis.visibleGrid = False
+    return chart
+
+
+def _drawing(chart, title, width, height, font_name):
+    d = Drawing(width, height)
+    # 그릴 때 시작 폰트도 같은 폰트로 둬서 기본 폰트(Times-Roman) 참조가 PDF에 생기지 않게 한다
+    d.initialFontName = font_name
+    d.add(chart)
+    d.add(String(width / 2, height - 12, title, fontName=font_name, fontSize=10, textAnchor="middle"))
+    # String은 회전 속성이 없어서 그룹 변환으로 세운다
+    ylabel = Group(String(0, 0, "Emissions (kgCO₂)", fontName=font_name, fontSize=7, textAnchor="middle"))
+    ylabel.transform = (0, 1, -1, 0, 12, chart.y + chart.height / 2)
+    d.add(ylabel)
+    d.add(String(chart.x + chart.width / 2, 2, "Date", fontName=font_name, fontSize=7, textAnchor="middle"))
+    return d
+
+
+def total_chart(months, emissions, width=500, height=160, font_name="Helvetica") -> Drawing:
+    chart = _bar_chart(months, [emissions], [TOTAL_COLOR], width, height, font_name)
+    return _drawing(chart, "Total Emissions", width, height, font_name)
+
+
+def scope_chart(months, scope1_list, scope2_list, width=500, height=160, font_name="Helvetica") -> Drawing:
+    chart = _bar_chart(months, [scope1_list, scope2_list], [SCOPE1_COLOR, SCOPE2_COLOR], width, height, font_name)
+    d = _drawing(chart, "Scope 1 & 2 Emissions", width, height, font_name)
+
+    legend = Legend()
+    legend.x, legend.y = width - 70, height - 8
+    legend.fontName = font_name
+    legend.fontSize = 6
+    legend.boxAnchor = "nw"
+    legend.columnMaximum = 2
+    legend.dx = legend.dy = 6
+    legend.colorNamePairs = [(SCOPE1_COLOR, "Scope 1"), (SCOPE2_COLOR, "Scope 2")]
+    d.add(legend)
+    return d
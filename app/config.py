@@ -0,0 +1,100 @@
+import os
+
+from dotenv import load_dotenv
+
+# 모든 설정은 환경변수(.env 포함)로 덮어쓸 수 있다
+load_dotenv()
+
+# 엑셀/CSV 업로드
+INGEST_CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "5000"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+
+# 보고서 생성 작업 큐
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+REPORT_QUEUE_DEPTH = int(os.getenv("REPORT_QUEUE_DEPTH", "16"))
+REPORT_JOB_HISTORY = int(os.getenv("REPORT_JOB_HISTORY", "200"))
+# 이 시간(초)이 지나도 끝나지 않은 작업은 워커가 죽은 것으로 보고 실패 처리한다
+REPORT_JOB_TIMEOUT = float(os.getenv("REPORT_JOB_TIMEOUT", "600"))
+# 시작 직후 백그라운드에서 reportlab/폰트를 미리 로드할지 여부
+REPORT_PREWARM = os.getenv("REPORT_PREWARM", "0") == "1"
+
+# 보고서 PDF 캐시 (사용자별, 내용 해시 기준)
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", "report_cache")
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# GPT 피드백
+FEEDBACK_BACKEND = os.getenv("FEEDBACK_BACKEND", "openai")   # openai | stub
+FEEDBACK_MODEL = os.getenv("FEEDBACK_MODEL", "gpt-3.5-turbo")
+FEEDBACK_TIMEOUT = float(os.getenv("FEEDBACK_TIMEOUT", "20"))
+FEEDBACK_CONCURRENCY = int(os.getenv("FEEDBACK_CONCURRENCY", "4"))
+FEEDBACK_CACHE_TTL = int(os.getenv("FEEDBACK_CACHE_TTL", str(7 * 24 * 3600)))
+FEEDBACK_CACHE_MAX = int(os.getenv("FEEDBACK_CACHE_MAX", "1000"))
+FEEDBACK_BREAKER_FAILURES = int(os.getenv("FEEDBACK_BREAKER_FAILURES", "3"))
+FEEDBACK_BREAKER_RESET = float(os.getenv("FEEDBACK_BREAKER_RESET", "60"))
+
+# 데이터베이스 (SQLite)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "sqlite+aiosqlite:///./app.db")
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# 요청 계측 (/metrics, Server-Timing)
+INSTRUMENTATION = os.getenv("INSTRUMENTATION", "1") == "1"
+# 한 요청에서 같은 SELECT가 이 횟수 이상 실행되면 N+1로 의심해 경고한다
+INSTRUMENT_REPEAT_THRESHOLD = int(os.getenv("INSTRUMENT_REPEAT_THRESHOLD", "10"))
+
+# 정적 자산 빌드 (지문 파일명, 사전 압축, 이미지 변형)
+ASSET_BUILD_DIR = os.getenv("ASSET_BUILD_DIR", "static_build")
+ASSET_BUILD_ON_STARTUP = os.getenv("ASSET_BUILD_ON_STARTUP", "1") == "1"
+ASSET_IMAGE_WIDTHS = [int(w) for w in os.getenv("ASSET_IMAGE_WIDTHS", "320,640,1024").split(",") if w]
+ASSET_WEBP_QUALITY = int(os.getenv("ASSET_WEBP_QUALITY", "80"))
+
+# 템플릿 (공유 Jinja 환경)
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", "template_cache")   # 빈 값이면 바이트코드 캐시를 쓰지 않는다
+TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", "0") == "1"
+TEMPLATE_FRAGMENT_CACHE = os.getenv("TEMPLATE_FRAGMENT_CACHE", "1") == "1"
+TEMPLATE_FRAGMENT_CACHE_MAX = int(os.getenv("TEMPLATE_FRAGMENT_CACHE_MAX", "1000"))
+
+# 운영 실행 (python run.py --prod)
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", str(os.cpu_count() or 1)))
+# 종료 시 진행 중인 요청/보고서 작업을 기다리는 최대 시간(초)
+SHUTDOWN_DRAIN_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "30"))
+
+# 계열사 일괄 업로드 (ZIP / 여러 시트 엑셀)
+BULK_INGEST_PROCESSES = int(os.getenv("BULK_INGEST_PROCESSES", str(min(4, os.cpu_count() or 1))))
+BULK_MAX_COMPANIES = int(os.getenv("BULK_MAX_COMPANIES", "200"))
+# ZIP 안 파일 하나 / 전체의 압축을 푼 크기 상한 (압축 폭탄 방지)
+BULK_MAX_FILE_BYTES = int(os.getenv("BULK_MAX_FILE_BYTES", str(50 * 1024 * 1024)))
+BULK_MAX_TOTAL_BYTES = int(os.getenv("BULK_MAX_TOTAL_BYTES", str(500 * 1024 * 1024)))
+
+# 거래 매칭
+MATCHING_PAGE_SIZE = int(os.getenv("MATCHING_PAGE_SIZE", "20"))
+# 늦게 커밋된 잔여량 갱신을 놓치지 않도록 증분 조회 구간을 이만큼 겹친다
+MATCHING_SYNC_OVERLAP_SECONDS = float(os.getenv("MATCHING_SYNC_OVERLAP_SECONDS", "30"))
+# 업종 변경처럼 잔여량 갱신 없이 바뀌는 값은 이 주기의 전체 동기화로 반영한다
+MATCHING_FULL_SYNC_SECONDS = float(os.getenv("MATCHING_FULL_SYNC_SECONDS", "600"))
+
+# 업종 벤치마크 (분위수 스케치)
+ANALYTICS_SKETCH_ALPHA = float(os.getenv("ANALYTICS_SKETCH_ALPHA", "0.01"))   # 분위수 상대 오차
+# 같은 업종/월의 사용자가 이보다 적으면 다른 회사 값이 드러나지 않도록 분위수를 보여 주지 않는다
+ANALYTICS_MIN_PEERS = int(os.getenv("ANALYTICS_MIN_PEERS", "3"))
+
+# 기간 말 배출량 예측
+FORECAST_HISTORY_MONTHS = int(os.getenv("FORECAST_HISTORY_MONTHS", "36"))   # 적합에 쓰는 최근 개월 수
+FORECAST_INTERVAL = float(os.getenv("FORECAST_INTERVAL", "0.9"))   # 예측 구간 신뢰수준
+
+# 보고서 일괄 내보내기 (ZIP)
+REPORT_EXPORT_PROCESSES = int(os.getenv("REPORT_EXPORT_PROCESSES", str(min(4, os.cpu_count() or 1))))
+REPORT_EXPORT_MAX = int(os.getenv("REPORT_EXPORT_MAX", "200"))
+# 모든 회사의 보고서를 내보낼 수 있는 컨설턴트 이메일 (쉼표로 구분)
+REPORT_EXPORT_CONSULTANTS = {
+    e.strip().lower() for e in os.getenv("REPORT_EXPORT_CONSULTANTS", "").split(",") if e.strip()
+}
@@ -0,0 +1,38 @@
+import datetime
+
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models import DataVersion, ReportBalance
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def touch(db: Session, user_id: int = None):
+    """user_id의 데이터 버전을 올린다. user_id가 없으면 전체 사용자 (커밋은 호출자가 한다)."""
+    now = datetime.datetime.utcnow()
+    if user_id is None:
+        db.execute(update(DataVersion).values(version=DataVersion.version + 1, updated_at=now))
+        return
+    stmt = insert(DataVersion).values(user_id=user_id, version=1, updated_at=now)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[DataVersion.user_id],
+        set_={"version": DataVersion.version + 1, "updated_at": now},
+    ))
+
+
+def user_version(db: Session, user_id: int):
+    """(version, updated_at) — 아직 쓴 적이 없으면 (0, EPOCH)"""
+    row = db.execute(
+        select(DataVersion.version, DataVersion.updated_at).where(DataVersion.user_id == user_id)
+    ).first()
+    return (row.version, row.updated_at) if row else (0, EPOCH)
+
+
+def balances_version(db: Session):
+    """매칭 목록은 모든 사용자의 잔여 배출권에 달려 있으므로 report_balances 전체의 (행 수, 마지막 갱신)"""
+    count, updated_at = db.execute(
+        select(func.count(), func.max(ReportBalance.updated_at))
+    ).one()
+    return count, updated_at or EPOCH
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models import EmissionRecord
+from app.factors import get_factor_table
+from app.months import month_keys
+
+# 엑셀 헤더 -> DB 컬럼
+COLUMN_MAP = {
+    "electricity (kWh)": "electricity",
+    "gasoline (L)": "gasoline",
+    "natural_gas (m³)": "natural_gas",
+    "district_heating (GJ)": "district_heating"
+}
+ACTIVITY_COLUMNS = ["electricity", "gasoline", "natural_gas", "district_heating"]
+EMISSION_COLUMNS = ["scope1", "scope2", "total_emission"]
+REQUIRED_COLUMNS = ["month"] + ACTIVITY_COLUMNS
+
+
+def missing_columns(df: pd.DataFrame) -> list:
+    """업로드 시트에 없는 필수 컬럼 이름 (엑셀 헤더는 COLUMN_MAP으로 바꿔서 본다)."""
+    columns = set(df.rename(columns=COLUMN_MAP).columns)
+    return [c for c in REQUIRED_COLUMNS if c not in columns]
+
+
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """업로드된 시트를 month + 활동량 컬럼만 남긴 형태로 정리한다."""
+    df = df.rename(columns=COLUMN_MAP)
+    out = pd.DataFrame({"month": month_keys(df["month"])})
+    for col in ACTIVITY_COLUMNS:
+        out[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    # 월을 해석할 수 없는 행은 버린다
+    out = out.dropna(subset=["month"])
+    out["month"] = out["month"].astype("int64")
+    # 같은 달이 여러 번 나오면 마지막 행이 이긴다 (기존 delete/add 순서와 동일)
+    return out.drop_duplicates(subset="month", keep="last").reset_index(drop=True)
+
+
+def load_existing(db: Session, user_id: int, company: str, months=None) -> pd.DataFrame:
+    stmt = select(
+        EmissionRecord.month, *[getattr(EmissionRecord, c) for c in ACTIVITY_COLUMNS]
+    ).where(EmissionRecord.user_id == user_id, EmissionRecord.company == company)
+    if months is not None:
+        stmt = stmt.where(EmissionRecord.month.in_([int(m) for m in months]))
+    rows = db.execute(stmt).all()
+    return pd.DataFrame(rows, columns=["month"] + ACTIVITY_COLUMNS)
+
+
+def changed_rows(df: pd.DataFrame, existing: pd.DataFrame) -> pd.DataFrame:
+    """소수 둘째 자리까지 비교해 새로 생겼거나 값이 바뀐 행만 돌려준다."""
+    if existing.empty:
+        return df
+    merged = df.merge(existing, on="month", how="left", suffixes=("", "_old"), indicator=True)
+    new = df[ACTIVITY_COLUMNS].astype("float64").round(2).to_numpy()
+    old = merged[[c + "_old" for c in ACTIVITY_COLUMNS]].astype("float64").round(2).to_numpy()
+    # 빈 칸(NaN/NULL)끼리는 같은 값으로 본다
+    equal = (new == old) | (np.isnan(new) & np.isnan(old))
+    same = equal.all(axis=1) & (merged["_merge"] == "both").to_numpy()
+    return df[~same]
+
+
+def upsert_records(db: Session, user_id: int, company: str, df: pd.DataFrame) -> int:
+    if df.empty:
+        return 0
+    rows = df[["month"] + ACTIVITY_COLUMNS + EMISSION_COLUMNS].to_dict("records")
+    for row in rows:
+        row["user_id"] = user_id
+        row["company"] = company
+
+    stmt = insert(EmissionRecord)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "company", "month"],
+        set_={c: stmt.excluded[c] for c in ACTIVITY_COLUMNS + EMISSION_COLUMNS}
+    )
+    db.execute(stmt, rows)
+    return len(rows)
+
+
+def save_frame(db: Session, user_id: int, company: str, df: pd.DataFrame):
+    """계산까지 끝난 DataFrame에서 바뀐 행만 upsert한다. (저장한 행 수, 가장 이른 바뀐 달 또는 None)"""
+    existing = load_existing(db, user_id, company, df["month"].unique())
+    changed = changed_rows(df, existing)
+    written = upsert_records(db, user_id, company, changed)
+    return written, (int(changed["month"].min()) if written else None)
+
+
+def save_upload(db: Session, user_id: int, company: str, df: pd.DataFrame):
+    """
+    시트 하나를 정리·계산한 뒤 바뀐 행만 upsert한다 (커밋은 호출자가 한다).
+    (저장한 행 수, 바뀐 달 중 가장 이른 달 또는 None)을 돌려준다.
+    """
+    df = get_factor_table(db).compute(prepare_frame(df))
+    return save_frame(db, user_id, company, df)
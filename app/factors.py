@@ -0,0 +1,156 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models import EmissionFactor, EmissionRecord
+from app.balance import refresh_balances
+from app.rollup import rebuild_all
+from app.data_version import touch
+from app.months import month_key
+
+# 최초 배출계수 (kgCO₂ / 단위). 처음부터 적용되도록 effective_from을 가장 이른 키(0)로 둔다.
+BASE_EFFECTIVE_FROM = 0
+DEFAULT_FACTORS = [
+    ("electricity", 2, 0.417),
+    ("gasoline", 1, 2.31),
+    ("natural_gas", 1, 0.203),
+    ("district_heating", 2, 110),
+]
+FUELS = [fuel for fuel, _, _ in DEFAULT_FACTORS]
+
+
+class FactorTable:
+    """연료별로 (적용 시작 월, 계수) 배열을 들고 있다가 월 배열에 맞는 계수를 한 번에 찾는다."""
+
+    def __init__(self, rows):
+        self.scopes = {}
+        self.months = {}
+        self.values = {}
+        by_fuel = {}
+        for fuel, scope, factor, effective_from in rows:
+            self.scopes[fuel] = scope
+            by_fuel.setdefault(fuel, []).append((effective_from, factor))
+        for fuel, items in by_fuel.items():
+            items.sort()
+            self.months[fuel] = np.array([m for m, _ in items], dtype="int64")
+            self.values[fuel] = np.array([f for _, f in items], dtype="float64")
+
+    def factors_for(self, fuel: str, months: np.ndarray) -> np.ndarray:
+        idx = np.searchsorted(self.months[fuel], months, side="right") - 1
+        # 가장 이른 적용 월보다 앞선 데이터는 첫 계수를 쓴다
+        return self.values[fuel][np.clip(idx, 0, None)]
+
+    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
+        """month + 활동량 컬럼이 있는 DataFrame에 scope1/scope2/total_emission을 채운다."""
+        months = df["month"].to_numpy(dtype="int64")
+        scopes = {1: np.zeros(len(df)), 2: np.zeros(len(df))}
+        for fuel in FUELS:
+            scopes[self.scopes[fuel]] += df[fuel].to_numpy(dtype="float64") * self.factors_for(fuel, months)
+        df["scope1"] = np.round(scopes[1], 2)
+        df["scope2"] = np.round(scopes[2], 2)
+        df["total_emission"] = np.round(scopes[1] + scopes[2], 2)
+        return df
+
+
+_cache = None       # (stamp, FactorTable)
+_cache_lock = threading.Lock()
+
+
+def _factor_stamp(db: Session):
+    # 계수는 다른 프로세스(python -m app.factors, 다른 서버 워커)에서도 바뀌므로 매번 DB에서 확인한다.
+    # 행 추가/삭제는 개수와 max(id)로, 기존 행의 계수 수정(upsert)은 합계로 드러난다
+    return tuple(db.execute(select(
+        func.count(), func.max(EmissionFactor.id), func.total(EmissionFactor.factor),
+        func.total(EmissionFactor.effective_from),
+    )).one())
+
+
+def get_factor_table(db: Session) -> FactorTable:
+    global _cache
+    # 비동기 세션의 run_sync 안에서는 쿼리 도중 같은 스레드의 다른 코루틴으로 넘어갈 수 있으므로
+    # 락을 쥔 채로 조회하지 않는다 (같은 스레드에서 락을 다시 잡으려다 멈춘다)
+    stamp = _factor_stamp(db)
+    cached = _cache
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    rows = db.execute(select(
+        EmissionFactor.fuel, EmissionFactor.scope, EmissionFactor.factor, EmissionFactor.effective_from
+    )).all()
+    table = FactorTable(rows)
+    with _cache_lock:
+        _cache = (stamp, table)
+    return table
+
+
+def invalidate_cache():
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+
+def seed_factors(conn):
+    """배출계수 테이블이 비어 있으면 기본값을 넣는다 (migrations에서 호출)."""
+    if conn.execute(select(EmissionFactor.id).limit(1)).first() is not None:
+        return
+    conn.execute(insert(EmissionFactor), [
+        {"fuel": fuel, "scope": scope, "factor": factor, "effective_from": BASE_EFFECTIVE_FROM}
+        for fuel, scope, factor in DEFAULT_FACTORS
+    ])
+
+
+def backfill_scopes(conn):
+    """scope 컬럼이 비어 있는 기존 행을 기본 계수로 채운다 (migrations에서 호출)."""
+    scopes = {1: [], 2: []}
+    for fuel, scope, factor in DEFAULT_FACTORS:
+        scopes[scope].append(getattr(EmissionRecord, fuel) * factor)
+    conn.execute(
+        update(EmissionRecord)
+        .where((EmissionRecord.scope1.is_(None)) | (EmissionRecord.scope2.is_(None)))
+        .values(scope1=func.round(sum(scopes[1]), 2), scope2=func.round(sum(scopes[2]), 2))
+    )
+
+
+def recompute_records(db: Session, since_month: int = None) -> int:
+    """since_month 이후 기록의 scope1/scope2/total을 현재 계수로 다시 계산해 한 번에 UPDATE한다."""
+    table = get_factor_table(db)
+    stmt = select(EmissionRecord.id, EmissionRecord.month, *[getattr(EmissionRecord, f) for f in FUELS])
+    if since_month is not None:
+        stmt = stmt.where(EmissionRecord.month >= since_month)
+    df = pd.DataFrame(db.execute(stmt).all(), columns=["id", "month"] + FUELS)
+    if df.empty:
+        return 0
+    df = table.compute(df)
+    rows = df[["id", "scope1", "scope2", "total_emission"]].to_dict("records")
+    db.execute(update(EmissionRecord), rows)
+    return len(rows)
+
+
+def set_factor(db: Session, fuel: str, factor: float, effective_from: int) -> int:
+    """계수를 추가/수정하고 영향받는 기록과 잔여 배출권을 다시 계산한다 (커밋은 호출자가 한다)."""
+    scope = next(s for f, s, _ in DEFAULT_FACTORS if f == fuel)
+    stmt = insert(EmissionFactor).values(fuel=fuel, scope=scope, factor=factor, effective_from=effective_from)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["fuel", "effective_from"], set_={"factor": stmt.excluded.factor}
+    ))
+    invalidate_cache()
+    updated = recompute_records(db, effective_from)
+    rebuild_all(db, effective_from)
+    refresh_balances(db)
+    touch(db)
+    return updated
+
+
+if __name__ == "__main__":
+    # python -m app.factors <fuel> <factor> <YYYY-MM>
+    import sys
+    from app.db import SessionLocal
+
+    fuel, factor, effective_from = sys.argv[1], float(sys.argv[2]), month_key(sys.argv[3])
+    with SessionLocal() as db:
+        count = set_factor(db, fuel, factor, effective_from)
+        db.commit()
+    print(f"{fuel}={factor} ({sys.argv[3]}~): {count} rows recomputed")
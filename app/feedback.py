@@ -0,0 +1,244 @@
+import asyncio
+import datetime
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import select, delete, func
+
+from app import config
+from app.db import SessionLocal
+from app.models import FeedbackCache
+from app.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = (
+    "당신은 기업의 월별 탄소배출 데이터를 분석하고 감축 전략을 제안하는 지속가능경영 전문가입니다. "
+    "데이터를 기반으로 인사이트와 실천 가능한 조언을 제공해 주세요."
+)
+
+
+def build_prompt(facts: dict) -> str:
+    return (
+        f"기업명: {facts['company']}\n"
+        f"분석 기간: {facts['start_month']}~{facts['end_month']}\n"
+        f"Scope1 배출량: {round(facts['scope1'], 2)} kgCO₂\n"
+        f"Scope2 배출량: {round(facts['scope2'], 2)} kgCO₂\n"
+        f"총 배출량: {round(facts['total'], 2)} kgCO₂\n"
+        f"배출 허용량 대비 차이: {facts['remaining']} kgCO₂\n"
+        f"월별 총배출량: {facts['monthly']}\n\n"
+        "위 정보를 바탕으로 다음 조건을 만족하는 6~8줄 이내의 간결한 전문가 피드백을 작성해 주세요:\n"
+        "1. 배출량 추이를 간단히 설명하고 가장 높은 달을 지목해 주세요.\n"
+        "2. 해당 월의 배출 증가 원인을 추정해 주세요 (계절, 설비, 물류, 이벤트 등 다양하게).\n"
+        "3. Scope1과 Scope2 중 주된 원인을 간단히 짚어 주세요.\n"
+        "4. 배출 감축을 위한 구체적 방안 1~2개 제안해 주세요.\n"
+        "5. 전체적으로 어떤 개선 방향이 필요한지 간결하게 마무리해 주세요.\n"
+        "각 문장은 줄바꿈을 위해 문장 끝에 `\\n`을 포함해 주세요."
+    )
+
+
+def prompt_hash(backend_name: str, model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{backend_name}|{model}|{SYSTEM_PROMPT}|{prompt}".encode()).hexdigest()
+
+
+def rule_based_feedback(facts: dict) -> str:
+    """LLM을 쓸 수 없을 때의 결정적 요약."""
+    monthly = facts["monthly"]
+    lines = []
+    if monthly:
+        months = list(monthly)
+        peak = max(months, key=lambda m: monthly[m])
+        first, last = monthly[months[0]], monthly[months[-1]]
+        trend = "증가" if last > first else "감소" if last < first else "유지"
+        lines.append(f"분석 기간 동안 월별 배출량은 {months[0]} {first} kgCO₂에서 {months[-1]} {last} kgCO₂로 {trend}했습니다.")
+        lines.append(f"배출량이 가장 높은 달은 {peak}({monthly[peak]} kgCO₂)입니다.")
+    main_scope = "Scope1(연료 직접 연소)" if facts["scope1"] >= facts["scope2"] else "Scope2(전력·열 사용)"
+    lines.append(f"전체 배출의 주된 원인은 {main_scope}입니다.")
+    if facts["scope1"] >= facts["scope2"]:
+        lines.append("차량 운행 효율화와 고효율 보일러 교체로 연료 사용량을 줄이는 것을 권장합니다.")
+    else:
+        lines.append("고효율 설비 도입과 재생에너지 전력 구매로 전력·열 사용 배출을 줄이는 것을 권장합니다.")
+    if facts["remaining"] < 0:
+        lines.append(f"현재 배출 허용량을 {abs(facts['remaining'])} kgCO₂ 초과하여 배출권 확보 또는 즉각적인 감축이 필요합니다.")
+    else:
+        lines.append(f"배출 허용량 대비 {facts['remaining']} kgCO₂ 여유가 있으나 지속적인 감축 관리가 필요합니다.")
+    return "\n".join(lines)
+
+
+class OpenAIBackend:
+    name = "openai"
+
+    def __init__(self, model: str):
+        self.model = model
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise RuntimeError("OPENAI_API_KEY 환경변수가 설정되어 있지 않습니다.")
+            self._client = AsyncOpenAI(api_key=api_key)
+        return self._client
+
+    async def complete(self, system: str, prompt: str) -> str:
+        res = await self._get_client().chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7
+        )
+        return res.choices[0].message.content
+
+
+class StubBackend:
+    """테스트/벤치마크용 로컬 백엔드. 네트워크 없이 즉시 결정적인 응답을 돌려준다."""
+    name = "stub"
+
+    def __init__(self, model: str = "stub", delay: float = 0.0):
+        self.model = model
+        self.delay = delay
+
+    async def complete(self, system: str, prompt: str) -> str:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+        return f"[stub {digest}] 배출량 추이를 점검하고 Scope별 감축 방안을 검토하세요."
+
+
+BACKENDS = {
+    "openai": OpenAIBackend,
+    "stub": StubBackend,
+}
+
+
+class CircuitBreaker:
+    def __init__(self, max_failures: int, reset_after: float):
+        self.max_failures = max_failures
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            # reset_after가 지나면 처음 들어온 호출 하나만 시도해 본다 (half-open). 결과가 나올 때까지 나머지는 막는다
+            if self._trial or time.monotonic() - self.opened_at < self.reset_after:
+                return False
+            self._trial = True
+            return True
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.max_failures:
+                # 시험 호출이 실패하면 다시 reset_after만큼 연다
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+
+class FeedbackService:
+    """
+    프롬프트 해시 기반 DB 캐시 -> 서킷 브레이커 -> 동시성 제한 + 타임아웃 백엔드 호출 -> 실패 시 규칙 기반 요약.
+    백엔드 호출은 전용 이벤트 루프 스레드에서 실행되므로 작업 스레드에서 동기적으로 부를 수 있다.
+    """
+
+    def __init__(self, backend, timeout: float, concurrency: int, breaker: CircuitBreaker,
+                 ttl: int, max_entries: int):
+        self.backend = backend
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.breaker = breaker
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._loop = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    def set_backend(self, backend):
+        self.backend = backend
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+                threading.Thread(target=self._loop.run_forever, name="feedback-loop", daemon=True).start()
+        return self._loop
+
+    async def _call(self, prompt: str) -> str:
+        async with self._semaphore:
+            return await asyncio.wait_for(self.backend.complete(SYSTEM_PROMPT, prompt), self.timeout)
+
+    def _cache_get(self, key: str):
+        now = datetime.datetime.utcnow()
+        with SessionLocal() as db:
+            row = db.get(FeedbackCache, key)
+            if row is None or row.created_at < now - datetime.timedelta(seconds=self.ttl):
+                return None
+            row.last_used_at = now
+            db.commit()
+            return row.content
+
+    def _cache_put(self, key: str, content: str):
+        now = datetime.datetime.utcnow()
+        with SessionLocal() as db:
+            db.merge(FeedbackCache(prompt_hash=key, content=content, created_at=now, last_used_at=now))
+            db.execute(delete(FeedbackCache).where(
+                FeedbackCache.created_at < now - datetime.timedelta(seconds=self.ttl)
+            ))
+            count = db.scalar(select(func.count()).select_from(FeedbackCache))
+            if count > self.max_entries:
+                oldest = select(FeedbackCache.prompt_hash).order_by(FeedbackCache.last_used_at).limit(count - self.max_entries)
+                db.execute(delete(FeedbackCache).where(FeedbackCache.prompt_hash.in_(oldest)))
+            db.commit()
+
+    def generate(self, facts: dict) -> dict:
+        """{"text": ..., "source": "cache" | backend 이름 | "fallback"}"""
+        prompt = build_prompt(facts)
+        key = prompt_hash(self.backend.name, self.backend.model, prompt)
+
+        cached = self._cache_get(key)
+        if cached is not None:
+            return {"text": cached, "source": "cache"}
+
+        if not self.breaker.allow():
+            return {"text": rule_based_feedback(facts), "source": "fallback"}
+
+        loop = self._ensure_loop()
+        try:
+            with span(f"feedback.{self.backend.name}"):
+                text = asyncio.run_coroutine_threadsafe(self._call(prompt), loop).result()
+        except Exception as e:
+            logger.warning("feedback backend %s failed: %r", self.backend.name, e)
+            self.breaker.failure()
+            return {"text": rule_based_feedback(facts), "source": "fallback"}
+
+        self.breaker.success()
+        text = text.strip()
+        self._cache_put(key, text)
+        return {"text": text, "source": self.backend.name}
+
+
+feedback_service = FeedbackService(
+    BACKENDS[config.FEEDBACK_BACKEND](config.FEEDBACK_MODEL),
+    timeout=config.FEEDBACK_TIMEOUT,
+    concurrency=config.FEEDBACK_CONCURRENCY,
+    breaker=CircuitBreaker(config.FEEDBACK_BREAKER_FAILURES, config.FEEDBACK_BREAKER_RESET),
+    ttl=config.FEEDBACK_CACHE_TTL,
+    max_entries=config.FEEDBACK_CACHE_MAX,
+)
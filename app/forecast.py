@@ -0,0 +1,208 @@
+import threading
+from statistics import NormalDist
+
+import numpy as np
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from app import config
+from app.models import ReportInfo, EmissionRollup, DataVersion
+from app.months import month_label
+
+# 보고 기간 말 배출량 예측: 사용자별 최근 FORECAST_HISTORY_MONTHS개월 월 합계에 추세 + 계절(12개월 주기 2차 조화항)을
+# 가중 최소제곱으로 맞추고, 남은 달의 예측 합계와 예측 구간을 낸다. 모든 사용자를 (사용자, 월, 항) 배열로 한 번에 푼다.
+# 결과는 사용자 데이터 버전(data_versions)이 바뀔 때까지 프로세스 안에 캐시한다.
+
+_FEATURES = 6            # 1, t, sin/cos(2πm/12), sin/cos(4πm/12)
+_OFF = 1e9               # 데이터가 모자라 쓰지 않는 항에 거는 벌점
+_RIDGE = 1e-6
+_MAX_AHEAD = 120         # 기준 시점에서 이보다 먼 달은 예측하지 않고 결과에 partial로 표시한다
+
+
+def _ordinal(month_key):
+    return (np.asarray(month_key) // 100) * 12 + np.asarray(month_key) % 100 - 1
+
+
+def _month_key(ordinal: int) -> int:
+    return int(ordinal // 12 * 100 + ordinal % 12 + 1)
+
+
+def _design(t, calendar_month):
+    angle = 2 * np.pi * calendar_month / 12
+    return np.stack([
+        np.ones_like(t), t,
+        np.sin(angle), np.cos(angle), np.sin(2 * angle), np.cos(2 * angle),
+    ], axis=-1)
+
+
+def fit_forecasts(reports, rollups, history: int, interval: float) -> dict:
+    """
+    reports: [(user_id, report_id, start_month, end_month, allowance)]
+    rollups: [(user_id, month, total)]
+    -> {user_id: 예측 dict}. 월 기록이 없는 사용자는 빠진다.
+    기록이 너무 적어 구간을 낼 수 없으면 *_lower/*_upper는 None이다.
+    기간 끝이 기준 시점에서 _MAX_AHEAD개월보다 멀면 projected_through까지만 더하고 partial이 True다.
+    """
+    if not reports or not rollups:
+        return {}
+    users = np.array([r[0] for r in reports])
+    index = {u: i for i, u in enumerate(users.tolist())}
+    start = _ordinal([r[2] for r in reports])
+    end = _ordinal([r[3] for r in reports])
+
+    rows = np.array([(index[u], m, v or 0.0) for u, m, v in rollups if u in index], dtype="float64").reshape(-1, 3)
+    if not len(rows):
+        return {}
+    n = len(reports)
+    row_user = rows[:, 0].astype("int64")
+    row_month = _ordinal(rows[:, 1].astype("int64"))
+    row_value = rows[:, 2]
+
+    # 마지막으로 기록이 있는 달(기간 끝을 넘지 않게)을 기준 시점으로 삼는다
+    usable = row_month <= end[row_user]
+    as_of = np.full(n, -1, dtype="int64")
+    np.maximum.at(as_of, row_user[usable], row_month[usable])
+    has_data = as_of >= 0
+    as_of = np.where(has_data, as_of, end)
+
+    # 기간 안 실제 합계 (시작 ~ 기준 시점)
+    in_period = usable & (row_month >= start[row_user])
+    actual = np.bincount(row_user[in_period], weights=row_value[in_period], minlength=n)
+
+    # 기준 시점에서 끝나는 history개월 창: (사용자, 위치) 격자에 값과 관측 여부를 채운다
+    pos = row_month - (as_of[row_user] - history + 1)
+    inside = usable & (pos >= 0) & (pos < history)
+    y = np.zeros((n, history))
+    w = np.zeros((n, history))
+    y[row_user[inside], pos[inside]] = row_value[inside]
+    w[row_user[inside], pos[inside]] = 1.0
+
+    steps = np.arange(history)
+    t = np.broadcast_to((steps - (history - 1)) / 12.0, (n, history))
+    calendar = (as_of[:, None] - (history - 1) + steps) % 12
+    x = _design(t, calendar)
+
+    # 관측이 적으면 계절항(12개월 미만), 추세항(3개월 미만)을 끈다
+    observed = w.sum(axis=1)
+    penalty = np.full((n, _FEATURES), _RIDGE)
+    penalty[observed < 3, 1] = _OFF
+    penalty[observed < 12, 2:] = _OFF
+    a = np.einsum("nhk,nh,nhj->nkj", x, w, x) + penalty[:, :, None] * np.eye(_FEATURES)
+    beta = np.linalg.solve(a, np.einsum("nhk,nh,nh->nk", x, w, y)[..., None])[..., 0]
+
+    fitted = np.einsum("nhk,nk->nh", x, beta)
+    params = (penalty < _OFF).sum(axis=1)
+    # 관측이 항 수보다 많아야 잔차로 분산을 잴 수 있다. 아니면 구간을 내지 않는다
+    enough = observed > params
+    sigma2 = (((y - fitted) * w) ** 2).sum(axis=1) / np.maximum(observed - params, 1)
+
+    # 기준 시점 다음 달부터 기간 끝까지 (기간 시작 전의 달은 세지 않는다)
+    horizon = int(np.clip((end - as_of).max(), 1, _MAX_AHEAD))
+    ahead = np.arange(1, horizon + 1)
+    future = as_of[:, None] + ahead
+    mask = ((future >= start[:, None]) & (future <= end[:, None])).astype("float64")
+    xf = _design(np.broadcast_to(ahead / 12.0, (n, horizon)), future % 12)
+    predicted = np.clip(np.einsum("nfk,nk->nf", xf, beta), 0, None)
+    forecast_sum = (predicted * mask).sum(axis=1)
+    # 예측 범위를 넘어 합계에 들어가지 못한 기간 안의 달
+    through = np.minimum(end, as_of + horizon)
+    unprojected = np.clip(end - np.maximum(through, start - 1), 0, None)
+
+    # 합계의 분산 = σ²(남은 달 수 + sᵀA⁻¹s), s는 남은 달 설계행의 합
+    s = np.einsum("nfk,nf->nk", xf, mask)
+    spread = np.einsum("nk,nk->n", s, np.linalg.solve(a, s[..., None])[..., 0])
+    z = NormalDist().inv_cdf((1 + interval) / 2)
+    half = z * np.sqrt(sigma2 * (mask.sum(axis=1) + spread))
+
+    results = {}
+    for i, (user_id, report_id, _, _, allowance) in enumerate(reports):
+        if not has_data[i]:
+            continue
+        projected = actual[i] + forecast_sum[i]
+        allowance = allowance or 0.0
+        if enough[i] or not mask[i].any():
+            lower = actual[i] + max(forecast_sum[i] - half[i], 0.0)
+            upper = actual[i] + forecast_sum[i] + half[i]
+            bounds = [round(float(v), 2) for v in (lower, upper, allowance - upper, allowance - lower)]
+        else:
+            bounds = [None] * 4
+        results[user_id] = {
+            "report_id": report_id,
+            "as_of": month_label(_month_key(as_of[i])),
+            "months_ahead": int(mask[i].sum()),
+            "partial": bool(unprojected[i]),
+            "projected_through": month_label(_month_key(through[i])),
+            "months_unprojected": int(unprojected[i]),
+            "actual": round(float(actual[i]), 2),
+            "projected_total": round(float(projected), 2),
+            "total_lower": bounds[0],
+            "total_upper": bounds[1],
+            "projected_balance": round(float(allowance - projected), 2),
+            "balance_lower": bounds[2],
+            "balance_upper": bounds[3],
+            "interval": interval,
+        }
+    return results
+
+
+def _latest_reports(user_ids):
+    return (
+        select(func.max(ReportInfo.id))
+        .where(ReportInfo.user_id.in_(user_ids))
+        .group_by(ReportInfo.user_id)
+    )
+
+
+class ForecastCache:
+    """user_id -> ((데이터 버전, 최신 보고서 id), 예측). 둘 중 하나가 바뀐 사용자만 모아 한 번에 다시 푼다."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _stamps(self, db: Session, user_ids) -> dict:
+        versions = dict(db.execute(
+            select(DataVersion.user_id, DataVersion.version).where(DataVersion.user_id.in_(user_ids))
+        ).all())
+        # 보고서 정보(기간, 할당량)는 새 행으로 저장되므로 최신 id가 바뀌면 다시 계산한다
+        reports = dict(db.execute(
+            select(ReportInfo.user_id, ReportInfo.id).where(ReportInfo.id.in_(_latest_reports(user_ids)))
+        ).all())
+        return {u: (versions.get(u, 0), reports.get(u)) for u in user_ids}
+
+    def get_many(self, db: Session, user_ids) -> dict:
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return {}
+        stamps = self._stamps(db, user_ids)
+        with self._lock:
+            stale = [u for u in user_ids if self._entries.get(u, (None,))[0] != stamps[u]]
+        if stale:
+            computed = _compute(db, stale)
+            with self._lock:
+                for u in stale:
+                    self._entries[u] = (stamps[u], computed.get(u))
+        with self._lock:
+            return {u: self._entries[u][1] for u in user_ids if u in self._entries}
+
+    def get(self, db: Session, user_id: int):
+        return self.get_many(db, [user_id]).get(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _compute(db: Session, user_ids) -> dict:
+    reports = db.execute(
+        select(ReportInfo.user_id, ReportInfo.id, ReportInfo.start_month, ReportInfo.end_month, ReportInfo.allowance)
+        .where(ReportInfo.id.in_(_latest_reports(user_ids)))
+    ).all()
+    rollups = db.execute(
+        select(EmissionRollup.user_id, EmissionRollup.month, EmissionRollup.total)
+        .where(EmissionRollup.user_id.in_(user_ids))
+    ).all()
+    return fit_forecasts(reports, rollups, config.FORECAST_HISTORY_MONTHS, config.FORECAST_INTERVAL)
+
+
+forecast_cache = ForecastCache()
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from fastapi import HTTPException, UploadFile
+from openpyxl import load_workbook
+from sqlalchemy.orm import Session
+
+from app import config
+from app.db import SessionLocal
+from app.emissions import missing_columns, save_upload
+from app.models import ReportInfo
+from app.balance import refresh_balances
+from app.rollup import rebuild_rollup
+from app.data_version import touch
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = config.INGEST_CHUNK_ROWS
+
+# 파싱은 이벤트 루프 밖의 전용 스레드 풀에서 실행한다
+_executor = ThreadPoolExecutor(max_workers=config.INGEST_WORKERS, thread_name_prefix="ingest")
+
+
+async def spool_upload(file: UploadFile) -> str:
+    """업로드를 메모리에 올리지 않고 임시 파일로 복사한다."""
+    suffix = os.path.splitext(file.filename or "")[1].lower() or ".xlsx"
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    loop = asyncio.get_running_loop()
+
+    def copy():
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(file.file, out, 1024 * 1024)
+
+    await loop.run_in_executor(_executor, copy)
+    return path
+
+
+def iter_excel_chunks(path: str, chunk_rows: int = CHUNK_ROWS, sheet: str = None):
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet is not None else wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(h) if h is not None else "" for h in header]
+        chunk = []
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield pd.DataFrame(chunk, columns=columns)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns)
+    finally:
+        wb.close()
+
+
+def iter_csv_chunks(path: str, chunk_rows: int = CHUNK_ROWS):
+    yield from pd.read_csv(path, chunksize=chunk_rows)
+
+
+def iter_chunks(path: str, chunk_rows: int = CHUNK_ROWS, sheet: str = None):
+    if path.endswith(".csv"):
+        return iter_csv_chunks(path, chunk_rows)
+    return iter_excel_chunks(path, chunk_rows, sheet)
+
+
+def earliest_month(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a, b)
+
+
+def _stats(rows: int, written: int, elapsed: float) -> dict:
+    return {
+        "rows": rows,
+        "written": written,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else float(rows),
+    }
+
+
+def ingest_path(db: Session, path: str, user_id: int, company: str, chunk_rows: int = CHUNK_ROWS) -> dict:
+    """파일을 chunk_rows 단위로 읽어 저장한다. 메모리 사용량은 청크 크기에만 비례한다."""
+    started = time.perf_counter()
+    rows = written = 0
+    since = None
+    for chunk in iter_chunks(path, chunk_rows):
+        if rows == 0:
+            missing = missing_columns(chunk)
+            if missing:
+                raise HTTPException(status_code=400, detail=f"필수 컬럼이 없습니다: {', '.join(missing)}")
+        rows += len(chunk)
+        count, first_month = save_upload(db, user_id, company, chunk)
+        written += count
+        since = earliest_month(since, first_month)
+    if since is not None:
+        rebuild_rollup(db, user_id, since)
+        touch(db, user_id)
+    stats = _stats(rows, written, time.perf_counter() - started)
+    logger.info("ingest user=%s company=%s %s", user_id, company, stats)
+    return stats
+
+
+def _ingest_committed(path: str, user_id: int, company: str, report: dict, chunk_rows: int) -> dict:
+    with SessionLocal() as db:
+        stats = ingest_path(db, path, user_id, company, chunk_rows)
+        if report is not None:
+            # 보고서 정보와 잔여 배출권도 같은 트랜잭션에 넣어 기록만 커밋되고 보고서가 빠지는 일이 없게 한다
+            db.add(ReportInfo(user_id=user_id, company=company, **report))
+            refresh_balances(db, user_id)
+            touch(db, user_id)
+        db.commit()
+    return stats
+
+
+async def ingest_upload(
+    file: UploadFile, user_id: int, company: str, report: dict = None, chunk_rows: int = CHUNK_ROWS
+) -> dict:
+    """
+    파싱, 계산, 저장, 롤업 재계산을 모두 작업 스레드에서 동기 세션으로 처리하고 한 번에 커밋한다.
+    report(start_month, end_month, allowance)가 있으면 보고서 정보도 같이 저장한다.
+    pandas 병합과 upsert가 이벤트 루프를 막지 않는다.
+    """
+    path = await spool_upload(file)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            _executor, _ingest_committed, path, user_id, company, report, chunk_rows
+        )
+    finally:
+        os.remove(path)
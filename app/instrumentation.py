@@ -0,0 +1,232 @@
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter as _Tally
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+# 요청별 라우트 시간/SQL 쿼리 수/구간(span) 시간을 모아 Prometheus 텍스트 형식으로 내보낸다 (/metrics)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets, labelnames=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                for bound, n in zip(self.buckets, counts):
+                    le = 'le="%s"' % bound
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {n}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = _Tally()
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "요청 처리 시간", LATENCY_BUCKETS, ("method", "route", "status"))
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "요청당 SQL 쿼리 수", QUERY_BUCKETS, ("route",))
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "요청당 SQL 실행 시간 합계", LATENCY_BUCKETS, ("route",))
+SPAN_SECONDS = Histogram(
+    "span_duration_seconds", "외부 호출/렌더링 구간 시간", LATENCY_BUCKETS, ("span",))
+REPEATED_QUERIES = Counter(
+    "db_repeated_query_requests_total", "같은 SELECT를 반복 실행한 요청 수 (N+1 의심)", ("route",))
+QUERY_ERRORS = Counter(
+    "db_query_errors_total", "실패한 SQL 실행 수 (IntegrityError, database is locked 등)", ("error",))
+METRICS = [REQUEST_SECONDS, REQUEST_QUERIES, REQUEST_DB_SECONDS, SPAN_SECONDS, REPEATED_QUERIES, QUERY_ERRORS]
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = _Tally()
+        self.spans = {}
+
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+# IN (?, ?, ?) 처럼 파라미터 개수만 다른 문장은 같은 쿼리로 본다
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def _normalize(statement: str) -> str:
+    return _IN_LIST.sub("(?)", _SPACES.sub(" ", statement)).strip()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _record(statement: str, elapsed: float):
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        stats.statements[_normalize(statement)] += 1
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record(statement, time.perf_counter() - conn.info["query_started"].pop())
+
+
+def _handle_error(exception_context):
+    # 실패한 실행은 after_cursor_execute가 불리지 않으므로 여기서 시작 시각을 꺼낸다.
+    # 그러지 않으면 풀에 돌아간 연결의 query_started가 실패할 때마다 하나씩 쌓인다
+    conn = exception_context.connection
+    started = conn.info.get("query_started") if conn is not None else None
+    if started and exception_context.execution_context is not None:
+        _record(exception_context.statement or "", time.perf_counter() - started.pop())
+    QUERY_ERRORS.inc(type(exception_context.original_exception).__name__)
+
+
+def instrument_engine(engine):
+    """동기 Engine에 쿼리 계측을 붙인다. AsyncEngine은 .sync_engine을 넘긴다."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def span(name: str):
+    """구간 시간을 span_duration_seconds에 기록하고, 요청 안이면 Server-Timing에도 싣는다."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        SPAN_SECONDS.observe(elapsed, name)
+        stats = _current.get()
+        if stats is not None:
+            stats.spans[name] = stats.spans.get(name, 0.0) + elapsed
+
+
+def _route_label(scope) -> str:
+    # 경로 그대로 쓰면 라벨 수가 끝없이 늘어나므로 매칭된 라우트 템플릿을 쓴다
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    if scope["path"].startswith("/static/"):
+        return "/static"
+    return "unmatched"
+
+
+def _server_timing(stats: RequestStats, elapsed: float) -> str:
+    parts = [f"app;dur={elapsed * 1000:.1f}", f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"']
+    parts += [f"{name.replace('.', '-')};dur={seconds * 1000:.1f}" for name, seconds in stats.spans.items()]
+    return ", ".join(parts)
+
+
+def _finish(scope, stats: RequestStats, status: int, elapsed: float):
+    route = _route_label(scope)
+    REQUEST_SECONDS.observe(elapsed, scope["method"], route, str(status))
+    REQUEST_QUERIES.observe(stats.queries, route)
+    REQUEST_DB_SECONDS.observe(stats.db_seconds, route)
+
+    repeated = [
+        (n, sql) for sql, n in stats.statements.items()
+        if n >= config.INSTRUMENT_REPEAT_THRESHOLD and sql.upper().startswith("SELECT")
+    ]
+    if repeated:
+        REPEATED_QUERIES.inc(route)
+        n, sql = max(repeated)
+        logger.warning("possible N+1 on %s %s: %d x %s", scope["method"], route, n, sql[:200])
+
+
+class InstrumentationMiddleware:
+    """순수 ASGI 미들웨어: 요청마다 RequestStats를 contextvar에 두고 응답에 Server-Timing을 붙인다."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", _server_timing(stats, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            _finish(scope, stats, status, time.perf_counter() - started)
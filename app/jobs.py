@@ -0,0 +1,278 @@
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, delete
+from sqlalchemy.exc import IntegrityError
+
+from app import config
+from app.db import SessionLocal
+from app.models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+ACTIVE = (QUEUED, RUNNING)
+
+
+class QueueFull(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    user_id: int
+    status: str = QUEUED
+    pid: int = None
+    result: dict = None
+    error: str = None
+    error_status: int = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+    future: object = None
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    @classmethod
+    def from_row(cls, row: ReportJob) -> "Job":
+        return cls(
+            id=row.id, user_id=row.user_id, status=row.status, pid=row.pid,
+            result=json.loads(row.result) if row.result else None,
+            error=row.error, error_status=row.error_status,
+            created_at=row.created_at, started_at=row.started_at, finished_at=row.finished_at,
+        )
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # 윈도우의 os.kill(pid, 0)은 프로세스를 끝내 버리므로 시간 제한으로만 정리한다
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """
+    고정 크기 스레드 풀 + 대기열 상한. 대기열이 차면 submit이 QueueFull을 던진다.
+    작업 상태는 report_jobs 테이블에 두므로 운영 실행에서 제출한 워커와 조회하는 워커가 달라도 된다.
+    작업 자체는 제출받은 워커의 스레드 풀에서 실행된다.
+    """
+
+    def __init__(self, workers: int, max_pending: int, history: int = 200, name: str = "jobs",
+                 timeout: float = 600, session_factory=SessionLocal):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.history = history
+        self.timeout = timeout
+        self._session = session_factory
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        # 이 프로세스에서 대기/실행 중인 작업 (future를 들고 있다)
+        self._local = {}
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def _pid(self) -> int:
+        # report_jobs는 fork 전에 만들어지므로 pid는 매번 읽는다
+        return os.getpid()
+
+    def _is_stale(self, row: ReportJob) -> bool:
+        """실행하던 워커가 죽었거나 시간 제한을 넘긴 작업"""
+        if row.status not in ACTIVE:
+            return False
+        if time.time() - row.created_at > self.timeout:
+            return True
+        if row.pid == self._pid():
+            # pid가 재사용된 새 프로세스라면 이 작업을 모른다
+            with self._lock:
+                return row.id not in self._local
+        return not _pid_alive(row.pid)
+
+    def _expire(self, db, rows):
+        stale = [row.id for row in rows if self._is_stale(row)]
+        if stale:
+            db.execute(
+                update(ReportJob)
+                .where(ReportJob.id.in_(stale), ReportJob.status.in_(ACTIVE))
+                .values(status=FAILED, error="작업을 처리하던 서버가 응답하지 않습니다. 다시 시도해 주세요.",
+                        error_status=503, finished_at=time.time())
+            )
+            db.commit()
+            logger.warning("expired stale report jobs: %s", stale)
+        return stale
+
+    def _active(self, db, user_id: int):
+        rows = db.execute(
+            select(ReportJob).where(ReportJob.user_id == user_id, ReportJob.status.in_(ACTIVE))
+        ).scalars().all()
+        stale = self._expire(db, rows)
+        return next((row for row in rows if row.id not in stale), None)
+
+    def _with_future(self, job: Job) -> Job:
+        with self._lock:
+            local = self._local.get(job.id)
+        job.future = local.future if local is not None else None
+        return job
+
+    def submit(self, user_id: int, fn, *args) -> Job:
+        """DB를 쓰므로 이벤트 루프에서는 asyncio.to_thread로 부른다."""
+        with self._session() as db:
+            # 같은 사용자가 이미 대기/실행 중인 작업이 있으면 (다른 워커의 작업이라도) 그대로 돌려준다
+            row = self._active(db, user_id)
+            if row is not None:
+                return self._with_future(Job.from_row(row))
+
+            job = Job(id=uuid.uuid4().hex, user_id=user_id, pid=self._pid())
+            with self._lock:
+                if self.closed or len(self._local) >= self.max_pending:
+                    raise QueueFull()
+                # DB에 쓰는 동안 자리를 잡아 둔다 (락을 쥔 채 DB를 기다리지 않는다)
+                self._local[job.id] = job
+            try:
+                db.add(ReportJob(id=job.id, user_id=user_id, status=QUEUED, pid=job.pid, created_at=job.created_at))
+                db.commit()
+            except IntegrityError:
+                # 다른 워커가 같은 사용자의 작업을 방금 넣었다
+                db.rollback()
+                with self._lock:
+                    del self._local[job.id]
+                row = self._active(db, user_id)
+                if row is None:
+                    raise QueueFull()
+                return self._with_future(Job.from_row(row))
+            except Exception:
+                with self._lock:
+                    del self._local[job.id]
+                raise
+            self._prune(db)
+        # 제출한 요청의 contextvar(계측 등)를 작업 스레드로 넘긴다
+        job.future = self._executor.submit(contextvars.copy_context().run, self._run, job, fn, args)
+        return job
+
+    def _prune(self, db):
+        keep = select(ReportJob.id).order_by(ReportJob.created_at.desc()).limit(self.history)
+        db.execute(delete(ReportJob).where(ReportJob.status.not_in(ACTIVE), ReportJob.id.not_in(keep)))
+        db.commit()
+
+    def _save(self, job: Job):
+        values = {
+            "status": job.status,
+            "error": job.error,
+            "error_status": job.error_status,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "result": json.dumps(job.result, ensure_ascii=False) if job.result is not None else None,
+        }
+        try:
+            with self._session() as db:
+                db.execute(update(ReportJob).where(ReportJob.id == job.id).values(**values))
+                db.commit()
+        except Exception:
+            # 저장하지 못한 작업은 시간 제한이 지나면 실패로 정리된다
+            logger.exception("could not save job %s", job.id)
+
+    def _run(self, job: Job, fn, args):
+        try:
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._save(job)
+            try:
+                job.result = fn(*args)
+                job.status = DONE
+            except HTTPException as e:
+                job.error, job.error_status = e.detail, e.status_code
+                job.status = FAILED
+            except Exception as e:
+                logger.exception("job %s failed", job.id)
+                job.error, job.error_status = str(e), 500
+                job.status = FAILED
+            job.finished_at = time.time()
+            self._save(job)
+        finally:
+            with self._lock:
+                self._local.pop(job.id, None)
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._session() as db:
+            row = db.get(ReportJob, job_id)
+            if row is None:
+                return None
+            if self._expire(db, [row]):
+                db.refresh(row)
+            return self._with_future(Job.from_row(row))
+
+    async def wait(self, job: Job, poll: float = 0.5) -> Job:
+        """작업이 끝날 때까지 기다린다. 다른 워커가 실행 중인 작업이면 DB를 주기적으로 다시 읽는다.
+        작업이 사라졌으면 None."""
+        if job.future is not None:
+            await asyncio.wrap_future(job.future)
+            return job
+        while True:
+            await asyncio.sleep(poll)
+            current = await asyncio.to_thread(self.get, job.id)
+            if current is None or current.finished:
+                return current
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._local)
+        return {"workers": self.workers, "pending": pending, "max_pending": self.max_pending}
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def drain(self, timeout: float) -> int:
+        """새 작업을 받지 않고 이 프로세스의 남은 작업을 timeout초까지 기다린다. 시작하지 못한 작업은 취소하고
+        그때까지 끝나지 않은 작업 수를 돌려준다."""
+        with self._lock:
+            self.closed = True
+            jobs = [j for j in self._local.values() if j.future is not None]
+        _, not_done = wait([j.future for j in jobs], timeout=timeout)
+        for job in jobs:
+            if job.future in not_done and job.future.cancel():
+                job.error, job.error_status = "서버 종료로 취소되었습니다.", 503
+                job.status = FAILED
+                job.finished_at = time.time()
+                self._save(job)
+                with self._lock:
+                    self._local.pop(job.id, None)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if not_done:
+            logger.warning("%d jobs still pending after %.0fs drain", len(not_done), timeout)
+        return len(not_done)
+
+
+report_jobs = JobQueue(
+    config.REPORT_WORKERS, config.REPORT_QUEUE_DEPTH, config.REPORT_JOB_HISTORY, name="report",
+    timeout=config.REPORT_JOB_TIMEOUT,
+)
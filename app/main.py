@@ -1,31 +1,110 @@
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
+import threading
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from app.db import engine, Base
+from app.db import engine, async_engine, Base, SessionLocal
+from app.balance import ensure_balances
+from app.migrations import run_migrations
+from app.jobs import report_jobs
+from app import bulk_ingest, report_export
+from app.instrumentation import InstrumentationMiddleware, instrument_engine
+from app.assets import AssetFiles, build_assets, build_in_background
+from app.factors import get_factor_table
+from app.templating import fragment_cache, precompile
+from app import config
 from starlette.middleware.sessions import SessionMiddleware
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI()
 
 
+def prepare():
+    """스키마/마이그레이션, 잔액 확인, 템플릿 컴파일. 프로세스마다가 아니라 서버당 한 번이면 된다."""
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        ensure_balances(db)
+    finally:
+        db.close()
+    precompile()
+
+
+_preloaded = False
+
+
+def preload():
+    """운영 실행(app.server)이 워커를 fork하기 전에 부모 프로세스에서 부른다.
+    템플릿, 보고서 폰트, 배출계수표, 자산 manifest는 읽기 전용이므로 워커들이 그대로 물려받아 쓴다."""
+    global _preloaded
+    prepare()
+    build_assets()
+    report.prewarm()
+    db = SessionLocal()
+    try:
+        get_factor_table(db)
+    finally:
+        db.close()
+    _preloaded = True
+
+
 @app.on_event("startup")
 def create_tables():
-    Base.metadata.create_all(bind=engine)
+    if not _preloaded:
+        prepare()
+        if config.ASSET_BUILD_ON_STARTUP:
+            # 빌드 전에 캐시된 조각은 /static 주소를 담고 있으므로 빌드가 끝나면 비운다
+            build_in_background(on_done=fragment_cache.clear)
+        if config.REPORT_PREWARM:
+            threading.Thread(target=report.prewarm, name="report-prewarm", daemon=True).start()
+
+    app.state.ready = True
+    # import 시작부터 요청을 받을 준비가 될 때까지 걸린 시간
+    app.state.startup_seconds = round(time.perf_counter() - _import_started, 3)
+    logger.info("startup completed in %.3fs", app.state.startup_seconds)
+
+
+@app.on_event("shutdown")
+async def stop_jobs():
+    app.state.ready = False
+    # 새 보고서 작업은 막고, 남은 작업은 SHUTDOWN_DRAIN_SECONDS까지 기다린다
+    await asyncio.to_thread(report_jobs.drain, config.SHUTDOWN_DRAIN_SECONDS)
+    bulk_ingest.shutdown()
+    report_export.shutdown()
+    await async_engine.dispose()
 
 
 
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
-templates = Jinja2Templates(directory="app/templates")
+# 지문 붙은 빌드 결과물 (python -m app.assets 또는 시작 시 빌드)
+app.mount("/assets", AssetFiles(directory=config.ASSET_BUILD_DIR, check_dir=False), name="assets")
 
 
 app.add_middleware(SessionMiddleware, secret_key="super-secret-key")
 
+if config.INSTRUMENTATION:
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+    # 마지막에 추가한 미들웨어가 가장 바깥에서 실행되므로 세션 처리 시간까지 포함된다
+    app.add_middleware(InstrumentationMiddleware)
+
 
 
-from .routers import auth, home, report, input, match, previous
+from .routers import auth, home, report, input, match, previous, api, metrics, health
 app.include_router(auth.router)
 app.include_router(home.router)
 app.include_router(report.router)
 app.include_router(input.router)
 app.include_router(match.router)
 app.include_router(previous.router)
+app.include_router(api.router)
+app.include_router(health.router)
+if config.INSTRUMENTATION:
+    app.include_router(metrics.router)
 
@@ -0,0 +1,187 @@
+import datetime
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from app import config
+from app.models import User, ReportInfo, ReportBalance
+from app.data_version import EPOCH
+
+# 거래 매칭 인덱스: 사용자마다 최신 보고서의 잔여 배출권을 들고, 여유(> 0)/부족(< 0) 쪽을 업종별 힙에 넣어 둔다.
+# report_balances.updated_at 기준으로 바뀐 행만 읽어 반영하고, 힙에서 밀려난 옛 항목은 꺼낼 때 버린다 (lazy deletion).
+
+SURPLUS = "surplus"
+DEFICIT = "deficit"
+
+
+@dataclass
+class Party:
+    user_id: int
+    report_id: int
+    email: str
+    company: str
+    industry: str
+    difference: float
+    version: int
+
+    @property
+    def side(self):
+        if self.difference > 0:
+            return SURPLUS
+        if self.difference < 0:
+            return DEFICIT
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.user_id,
+            "email": self.email,
+            "company": self.company,
+            "industry": self.industry,
+            "difference": self.difference,
+        }
+
+
+def load_balances(db: Session, since: datetime.datetime = None):
+    """사용자별 최신 보고서의 잔여량. since를 주면 그 뒤에 갱신된 행만 읽는다."""
+    latest_report = (
+        select(func.max(ReportInfo.id))
+        .where(ReportInfo.user_id == ReportBalance.user_id)
+        .correlate(ReportBalance)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(
+            ReportBalance.user_id,
+            ReportBalance.report_id,
+            User.email,
+            ReportBalance.company,
+            User.industry,
+            ReportBalance.difference,
+            ReportBalance.updated_at,
+        )
+        .join(User, User.id == ReportBalance.user_id)
+        .where(ReportBalance.report_id == latest_report)
+    )
+    if since is not None:
+        stmt = stmt.where(ReportBalance.updated_at >= since)
+    return db.execute(stmt).all()
+
+
+def _cents(value: float) -> int:
+    return int(round(abs(value) * 100))
+
+
+def _ordered(heap: list):
+    """힙을 바꾸지 않고 작은 항목부터 꺼낸다. k개를 보는 데 O(k log k)."""
+    if not heap:
+        return
+    frontier = [(heap[0], 0)]
+    while frontier:
+        item, i = heapq.heappop(frontier)
+        yield item
+        for child in (2 * i + 1, 2 * i + 2):
+            if child < len(heap):
+                heapq.heappush(frontier, (heap[child], child))
+
+
+class MatchingEngine:
+    def __init__(self, overlap_seconds: float, full_sync_seconds: float):
+        # 커밋이 늦게 끝난 트랜잭션의 updated_at이 워터마크보다 앞설 수 있으므로 조금 겹쳐 읽는다
+        self.overlap = datetime.timedelta(seconds=overlap_seconds)
+        self.full_sync_seconds = full_sync_seconds
+        self._lock = threading.Lock()
+        self._versions = itertools.count()
+        self._reset()
+
+    def _reset(self):
+        self._parties = {}
+        # side -> industry -> [(-|잔여량|, user_id, version)]  (잔여량이 큰 쪽이 먼저)
+        self._heaps = {SURPLUS: defaultdict(list), DEFICIT: defaultdict(list)}
+        self._live = {SURPLUS: Counter(), DEFICIT: Counter()}
+        self._watermark = None
+        self._full_synced_at = 0.0
+
+    def sync(self, db: Session) -> int:
+        """바뀐 잔여량을 반영하고 반영한 행 수를 돌려준다. 오래되면 전체를 다시 읽는다."""
+        full = self._watermark is None or time.monotonic() - self._full_synced_at > self.full_sync_seconds
+        # DB 조회는 락 밖에서 한다 (run_sync 안에서 다른 코루틴이 같은 스레드로 들어올 수 있다)
+        rows = load_balances(db, None if full else self._watermark - self.overlap)
+        with self._lock:
+            if full:
+                self._reset()
+                self._full_synced_at = time.monotonic()
+            applied = sum(1 for row in rows if self._apply(row))
+            newest = max((row.updated_at for row in rows), default=EPOCH)
+            self._watermark = max(self._watermark or EPOCH, newest)
+        return applied
+
+    def _apply(self, row) -> bool:
+        old = self._parties.get(row.user_id)
+        key = (row.report_id, row.email, row.company, row.industry, row.difference)
+        if old is not None and key == (old.report_id, old.email, old.company, old.industry, old.difference):
+            return False
+        if old is not None and old.side:
+            self._live[old.side][old.industry] -= 1
+        party = Party(row.user_id, row.report_id, row.email, row.company, row.industry,
+                      row.difference, next(self._versions))
+        self._parties[row.user_id] = party
+        if party.side:
+            heap = self._heaps[party.side][party.industry]
+            heapq.heappush(heap, (-abs(party.difference), party.user_id, party.version))
+            self._live[party.side][party.industry] += 1
+            # 버려진 항목이 살아 있는 항목보다 훨씬 많아지면 힙을 새로 만든다
+            if len(heap) > 2 * self._live[party.side][party.industry] + 32:
+                heap[:] = [item for item in heap if self._is_live(item)]
+                heapq.heapify(heap)
+        return True
+
+    def _is_live(self, item) -> bool:
+        party = self._parties.get(item[1])
+        return party is not None and party.version == item[2]
+
+    def _ranked(self, side: str, industry: str, exclude_user: int):
+        """같은 업종을 먼저, 그 안에서는 잔여량이 큰 순서로 상대 후보를 낸다."""
+        heaps = self._heaps[side]
+        same = _ordered(heaps.get(industry, []))
+        others = heapq.merge(*(_ordered(h) for ind, h in heaps.items() if ind != industry))
+        for item in itertools.chain(same, others):
+            if item[1] != exclude_user and self._is_live(item):
+                yield self._parties[item[1]]
+
+    def counterparties(self, side: str, industry: str, user_id: int, offset: int = 0, limit: int = 20):
+        """(side 쪽 상대 목록의 offset부터 limit개, 전체 수)"""
+        with self._lock:
+            page = [p.to_dict() for p in itertools.islice(self._ranked(side, industry, user_id), offset, offset + limit)]
+            me = self._parties.get(user_id)
+            total = sum(self._live[side].values()) - (1 if me is not None and me.side == side else 0)
+        return page, total
+
+    def pairing(self, user_id: int) -> dict:
+        """사용자의 부족분(또는 여유분)을 반대편의 큰 잔여량부터, 같은 업종을 우선해 채우는 탐욕 배정."""
+        with self._lock:
+            me = self._parties.get(user_id)
+            if me is None or me.side is None:
+                return {"pairs": [], "uncovered": 0.0}
+            other = DEFICIT if me.side == SURPLUS else SURPLUS
+            # 소수 오차로 0.0 배정이 끝없이 붙지 않도록 정수 센트 단위로 계산한다
+            gap = _cents(me.difference)
+            pairs = []
+            for party in self._ranked(other, me.industry, user_id):
+                if gap <= 0:
+                    break
+                amount = min(gap, _cents(party.difference))
+                if amount <= 0:
+                    continue
+                pairs.append({**party.to_dict(), "amount": amount / 100})
+                gap -= amount
+        return {"pairs": pairs, "uncovered": gap / 100}
+
+
+matching_engine = MatchingEngine(config.MATCHING_SYNC_OVERLAP_SECONDS, config.MATCHING_FULL_SYNC_SECONDS)
@@ -0,0 +1,148 @@
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.db import Base
+from app.months import month_keys
+from app.factors import seed_factors, backfill_scopes
+from app.rollup import rebuild_all
+from app.analytics import rebuild_sketches
+
+
+
+class MigrationError(RuntimeError):
+    """데이터를 사람이 고쳐야 진행할 수 있는 마이그레이션 실패. 트랜잭션 전체가 롤백된다."""
+
+
+def add_column(table: str, column: str, ddl: str):
+    def step(conn):
+        columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+        if column not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return step
+
+
+def _load_month_map(conn, table: str, month_columns: list):
+    """옛 월 문자열 -> YYYYMM 키를 임시 테이블 _month_map에 넣는다. 앱과 같은 month_keys로 해석한다."""
+    conn.execute(text("DROP TABLE IF EXISTS temp._month_map"))
+    conn.execute(text("CREATE TEMP TABLE _month_map (raw TEXT PRIMARY KEY, key INTEGER NOT NULL)"))
+    raw = set()
+    for col in month_columns:
+        raw.update(str(v) for v in conn.execute(
+            text(f"SELECT DISTINCT {col} FROM {table} WHERE {col} IS NOT NULL")
+        ).scalars())
+    values = sorted(raw)
+    keys = month_keys(pd.Series(values, dtype="object"))
+    bad = [v for v, k in zip(values, keys) if pd.isna(k)]
+    if bad:
+        # 0 같은 가짜 달로 바꿔 넣지 않고 멈춘다
+        raise MigrationError(
+            f"{table}: 월로 해석할 수 없는 값이 {len(bad)}개 있습니다 ({', '.join(map(repr, bad[:5]))}). "
+            "YYYY-MM 형식으로 고친 뒤 다시 시작하세요."
+        )
+    if values:
+        conn.execute(text("INSERT INTO _month_map (raw, key) VALUES (:raw, :key)"),
+                     [{"raw": v, "key": int(k)} for v, k in zip(values, keys)])
+
+
+def _check_unique_months(conn, table: str, month_columns: list):
+    """서로 다른 옛 문자열('2024-03', '2024-03-01')이 같은 키가 되어 유일 인덱스와 부딪히는 행을 찾는다."""
+    model = Base.metadata.tables[table]
+    unique_keys = [[c.name for c in index.columns] for index in model.indexes if index.unique]
+    unique_keys.append([c.name for c in model.primary_key.columns])
+    for names in unique_keys:
+        months = [c for c in names if c in month_columns]
+        if not months:
+            continue
+        group = [f"m_{c}.key" if c in months else f"t.{c}" for c in names]
+        joins = " ".join(f"JOIN _month_map m_{c} ON m_{c}.raw = t.{c}" for c in months)
+        row = conn.execute(text(
+            f"SELECT {', '.join(group)}, group_concat(t.{months[0]}, ', ') FROM {table} t {joins} "
+            f"GROUP BY {', '.join(group)} HAVING COUNT(*) > 1 LIMIT 1"
+        )).first()
+        if row is not None:
+            key = ", ".join(f"{n}={v}" for n, v in zip(names, row[:-1]))
+            raise MigrationError(
+                f"{table}: 서로 다른 월 값({row[-1]})이 같은 키({key})가 됩니다. 중복 행을 정리한 뒤 다시 시작하세요."
+            )
+
+
+def convert_month_columns(table: str, month_columns: list):
+    """SQLite는 컬럼 타입을 바꿀 수 없으므로 테이블을 현재 모델로 다시 만들고 월 컬럼을 정수로 옮긴다."""
+    def step(conn):
+        info = {row[1]: row[2] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+        if not info or all(info[c].upper() == "INTEGER" for c in month_columns):
+            return
+        _load_month_map(conn, table, month_columns)
+        _check_unique_months(conn, table, month_columns)
+        indexes = conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :t AND sql IS NOT NULL"
+        ), {"t": table}).scalars().all()
+        for name in indexes:
+            conn.execute(text(f'DROP INDEX "{name}"'))
+        # 다른 테이블의 FK가 _old 테이블을 가리키도록 바뀌지 않게 한다
+        conn.execute(text("PRAGMA legacy_alter_table = ON"))
+        conn.execute(text(f"ALTER TABLE {table} RENAME TO {table}_old"))
+        conn.execute(text("PRAGMA legacy_alter_table = OFF"))
+        Base.metadata.tables[table].create(conn)
+        columns = [c.name for c in Base.metadata.tables[table].columns if c.name in info]
+        values = [
+            f"(SELECT key FROM _month_map WHERE raw = {c})" if c in month_columns else c for c in columns
+        ]
+        conn.execute(text(
+            f"INSERT INTO {table} ({', '.join(columns)}) SELECT {', '.join(values)} FROM {table}_old"
+        ))
+        conn.execute(text(f"DROP TABLE {table}_old"))
+        conn.execute(text("DROP TABLE temp._month_map"))
+    return step
+
+
+# create_all은 기존 테이블을 바꾸지 않으므로, 이미 만들어진 DB용 변경은 여기에 순서대로 추가한다.
+# (name, [SQL 또는 callable(conn) ...]) — 한 번 적용된 name은 schema_migrations에 기록되어 다시 실행되지 않는다.
+MIGRATIONS = [
+    ("0001_emission_unique_key", [
+        "DELETE FROM emission_records WHERE id NOT IN "
+        "(SELECT MAX(id) FROM emission_records GROUP BY user_id, company, month)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_emission_user_company_month "
+        "ON emission_records (user_id, company, month)",
+    ]),
+    ("0002_emission_factors_and_scopes", [
+        add_column("emission_records", "scope1", "FLOAT"),
+        add_column("emission_records", "scope2", "FLOAT"),
+        seed_factors,
+        backfill_scopes,
+    ]),
+    ("0003_emission_rollups", [
+        rebuild_all,
+    ]),
+    ("0004_integer_month_keys", [
+        convert_month_columns("emission_records", ["month"]),
+        convert_month_columns("report_info", ["start_month", "end_month"]),
+        convert_month_columns("emission_factors", ["effective_from"]),
+        convert_month_columns("emission_rollups", ["month"]),
+        "CREATE INDEX IF NOT EXISTS ix_emission_user_month ON emission_records (user_id, month)",
+        "CREATE INDEX IF NOT EXISTS ix_report_info_user_id_id ON report_info (user_id, id)",
+        rebuild_all,
+    ]),
+    ("0005_report_balances_updated_at_index", [
+        "CREATE INDEX IF NOT EXISTS ix_report_balances_updated_at ON report_balances (updated_at)",
+    ]),
+    ("0006_industry_sketches", [
+        rebuild_sketches,
+    ]),
+]
+
+
+def run_migrations(engine: Engine):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS schema_migrations (name VARCHAR PRIMARY KEY)"))
+        applied = set(conn.execute(text("SELECT name FROM schema_migrations")).scalars())
+        for name, statements in MIGRATIONS:
+            if name in applied:
+                continue
+            for sql in statements:
+                if callable(sql):
+                    sql(conn)
+                else:
+                    conn.execute(text(sql))
+            conn.execute(text("INSERT INTO schema_migrations (name) VALUES (:name)"), {"name": name})
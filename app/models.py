@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Index, Text, text
 from sqlalchemy.orm import relationship
 from .db import Base
 import datetime
@@ -29,21 +29,127 @@ class EmissionRecord(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     company = Column(String, nullable=False)
-    month = Column(String, index=True)
+    month = Column(Integer, nullable=False)   # YYYYMM
     electricity = Column(Float)
     gasoline = Column(Float)
     natural_gas = Column(Float)
     district_heating = Column(Float)
     total_emission = Column(Float)   
+    scope1 = Column(Float)
+    scope2 = Column(Float)
     
     owner = relationship("User")
+
+    __table_args__ = (
+        Index("uq_emission_user_company_month", "user_id", "company", "month", unique=True),
+        Index("ix_emission_user_month", "user_id", "month"),
+    )
     
 class ReportInfo(Base):
     __tablename__ = "report_info"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     company = Column(String)
-    start_month = Column(String)
-    end_month = Column(String)
+    start_month = Column(Integer)   # YYYYMM
+    end_month = Column(Integer)     # YYYYMM
+    allowance = Column(Float)
+    owner = relationship("User")
+
+    __table_args__ = (
+        Index("ix_report_info_user_id_id", "user_id", "id"),
+    )
+
+
+class ReportBalance(Base):
+    __tablename__ = "report_balances"
+
+    report_id = Column(Integer, ForeignKey("report_info.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    company = Column(String)
     allowance = Column(Float)
-    owner = relationship("User")
\ No newline at end of file
+    emission_sum = Column(Float)
+    difference = Column(Float)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+    report = relationship("ReportInfo")
+
+
+class FeedbackCache(Base):
+    __tablename__ = "feedback_cache"
+
+    prompt_hash = Column(String, primary_key=True)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    last_used_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+
+class EmissionFactor(Base):
+    __tablename__ = "emission_factors"
+
+    id = Column(Integer, primary_key=True, index=True)
+    fuel = Column(String, nullable=False)            # electricity, gasoline, natural_gas, district_heating
+    scope = Column(Integer, nullable=False)          # 1 또는 2
+    factor = Column(Float, nullable=False)           # kgCO₂ / 단위
+    effective_from = Column(Integer, nullable=False) # YYYYMM, 이 달부터 적용
+
+    __table_args__ = (
+        Index("uq_emission_factor_fuel_effective", "fuel", "effective_from", unique=True),
+    )
+
+
+class EmissionRollup(Base):
+    # 사용자별 월 합계와 누적합. 기간 합계 = 누적(end) - 누적(start 직전)
+    __tablename__ = "emission_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month = Column(Integer, primary_key=True)   # YYYYMM
+    total = Column(Float, nullable=False, default=0)
+    scope1 = Column(Float, nullable=False, default=0)
+    scope2 = Column(Float, nullable=False, default=0)
+    cum_total = Column(Float, nullable=False, default=0)
+    cum_scope1 = Column(Float, nullable=False, default=0)
+    cum_scope2 = Column(Float, nullable=False, default=0)
+
+
+class DataVersion(Base):
+    """사용자 데이터(배출 기록, 보고서 정보)가 바뀔 때마다 올라가는 버전 — JSON API의 ETag/Last-Modified 기준"""
+    __tablename__ = "data_versions"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+
+class ReportJob(Base):
+    """보고서 생성 작업 상태. 운영 실행(pre-fork)의 어느 워커에서 조회해도 보이도록 DB에 둔다 (app.jobs)"""
+    __tablename__ = "report_jobs"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(String, nullable=False)   # queued | running | done | failed
+    pid = Column(Integer)                     # 작업을 실행하는 워커 프로세스
+    result = Column(Text)                     # JSON
+    error = Column(Text)
+    error_status = Column(Integer)
+    created_at = Column(Float, nullable=False)   # time.time()
+    started_at = Column(Float)
+    finished_at = Column(Float)
+
+    __table_args__ = (
+        # 사용자당 대기/실행 중인 작업은 워커가 달라도 하나뿐이다
+        Index("uq_report_job_active_user", "user_id", unique=True,
+              sqlite_where=text("status IN ('queued', 'running')")),
+        Index("ix_report_job_created_at", "created_at"),
+    )
+
+
+class IndustrySketch(Base):
+    """업종/월/지표별 사용자 월 배출량 분포 (app.analytics.QuantileSketch를 직렬화한 로그 버킷 개수)"""
+    __tablename__ = "industry_sketches"
+
+    industry = Column(String, primary_key=True)
+    month = Column(Integer, primary_key=True)   # YYYYMM
+    metric = Column(String, primary_key=True)   # total | scope1 | scope2
+    count = Column(Integer, nullable=False, default=0)
+    zeros = Column(Integer, nullable=False, default=0)
+    bins = Column(Text, nullable=False, default="{}")   # {"버킷 번호": 개수}
+    updated_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
\ No newline at end of file
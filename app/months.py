@@ -0,0 +1,42 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+# 월은 DB에 정수 YYYYMM 키로 저장한다 (예: 2024-03 -> 202403)
+
+_MONTH_PATTERN = r"^\s*(\d{4})\D?(\d{1,2})"
+
+
+def month_key(value) -> int:
+    """'2024-03', '2024-03-15', '202403', date/datetime -> 202403"""
+    if isinstance(value, (datetime.date, datetime.datetime, pd.Timestamp)):
+        return value.year * 100 + value.month
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    keys = month_keys(pd.Series([value]))
+    if keys.isna().iloc[0]:
+        raise ValueError(f"잘못된 월 형식입니다: {value!r}")
+    return int(keys.iloc[0])
+
+
+def month_keys(values: pd.Series) -> pd.Series:
+    """month_key의 벡터 버전. 해석할 수 없는 값은 <NA>가 된다."""
+    parts = values.astype(str).str.extract(_MONTH_PATTERN)
+    year = pd.to_numeric(parts[0], errors="coerce")
+    month = pd.to_numeric(parts[1], errors="coerce")
+    keys = (year * 100 + month).where(month.between(1, 12))
+    return keys.astype("Int64")
+
+
+def month_label(key: int) -> str:
+    return f"{key // 100:04d}-{key % 100:02d}"
+
+
+def form_month(value: str) -> int:
+    """폼에서 받은 YYYY-MM 값을 키로 바꾸고, 형식이 틀리면 400을 돌려준다."""
+    try:
+        return month_key(value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
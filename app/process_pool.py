@@ -0,0 +1,58 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessPool:
+    """
+    처음 쓸 때 만드는 spawn 프로세스 풀 (bulk_ingest, report_export).
+    작업 프로세스 하나가 비정상 종료하면(OOM kill 등) ProcessPoolExecutor는 이후 모든 작업을 BrokenProcessPool로
+    거절하므로, 깨진 풀은 버리고 새로 만들어 그 작업을 한 번 더 실행한다.
+    """
+
+    def __init__(self, max_workers: int, initializer=None, name: str = "pool"):
+        self.max_workers = max_workers
+        self.initializer = initializer
+        self.name = name
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # 서버 워커는 스레드를 쓰므로 fork 대신 spawn으로 띄운다
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self.initializer,
+                )
+            return self._pool
+
+    def _discard(self, pool: ProcessPoolExecutor):
+        with self._lock:
+            # 같은 풀에서 실패한 다른 작업이 이미 새 풀로 바꿨으면 그대로 둔다
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn, *args):
+        """fn(*args)를 작업 프로세스에서 실행한다. 풀이 깨져 있거나 실행 중에 깨지면 새 풀에서 한 번 더 시도한다."""
+        loop = asyncio.get_running_loop()
+        pool = self.get()
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            logger.warning("%s process pool is broken, restarting it and retrying %s", self.name, fn.__name__)
+            self._discard(pool)
+            return await loop.run_in_executor(self.get(), fn, *args)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
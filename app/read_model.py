@@ -0,0 +1,76 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import User, EmissionRecord, ReportInfo
+from app.months import month_label
+
+# 읽기 전용 조회는 ORM 객체 대신 필요한 컬럼만 튜플(Row)로 가져온다 — identity map/객체 생성 비용이 없다
+
+RECORD_BATCH = 1000
+
+RECORD_COLUMNS = [
+    "month", "company", "electricity", "gasoline", "natural_gas", "district_heating",
+    "total_emission", "scope1", "scope2",
+]
+RESULT_COLUMNS = ["electricity", "gasoline", "natural_gas", "district_heating", "total_emission"]
+SCOPE_COLUMNS = ["scope1", "scope2"]
+
+
+def latest_report_info(db: Session, user_id: int):
+    """가장 최근 ReportInfo의 (id, company, start_month, end_month, allowance) 또는 None"""
+    return db.execute(
+        select(ReportInfo.id, ReportInfo.company, ReportInfo.start_month, ReportInfo.end_month, ReportInfo.allowance)
+        .where(ReportInfo.user_id == user_id)
+        .order_by(ReportInfo.id.desc())
+        .limit(1)
+    ).first()
+
+
+def user_industry(db: Session, user_id: int):
+    return db.scalar(select(User.industry).where(User.id == user_id))
+
+
+def has_records(db: Session, user_id: int, start_month: int, end_month: int) -> bool:
+    return db.scalar(
+        select(EmissionRecord.id)
+        .where(
+            EmissionRecord.user_id == user_id,
+            EmissionRecord.month >= start_month,
+            EmissionRecord.month <= end_month,
+        )
+        .limit(1)
+    ) is not None
+
+
+def iter_monthly_records(db: Session, user_id: int, start_month: int, end_month: int):
+    """기간 내 월별 기록을 RECORD_COLUMNS 순서의 Row로 RECORD_BATCH개씩 흘려 보낸다."""
+    stmt = (
+        select(*[getattr(EmissionRecord, c) for c in RECORD_COLUMNS])
+        .where(
+            EmissionRecord.user_id == user_id,
+            EmissionRecord.month >= start_month,
+            EmissionRecord.month <= end_month,
+        )
+        .order_by(EmissionRecord.month, EmissionRecord.id)
+        .execution_options(yield_per=RECORD_BATCH)
+    )
+    for partition in db.execute(stmt).partitions():
+        yield from partition
+
+
+def dashboard_series(rows, unique_months: bool = False):
+    """대시보드 차트용 (results, scopes) 목록 (rows는 한 번만 훑는다). unique_months면 같은 달은 처음 행만 쓴다."""
+    results, scopes, seen = [], [], set()
+    for r in rows:
+        if unique_months:
+            if r.month in seen:
+                continue
+            seen.add(r.month)
+        label = month_label(r.month)
+        results.append({"month": label, **{c: getattr(r, c) for c in RESULT_COLUMNS}})
+        scopes.append({"month": label, **{c: getattr(r, c) for c in SCOPE_COLUMNS}})
+    return results, scopes
+
+
+def monthly_dashboard(db: Session, user_id: int, start_month: int, end_month: int, unique_months: bool = False):
+    return dashboard_series(iter_monthly_records(db, user_id, start_month, end_month), unique_months)
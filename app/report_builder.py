@@ -0,0 +1,293 @@
+import threading
+from xml.sax.saxutils import escape
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import (
+    SimpleDocTemplate, Paragraph, Spacer, Image, Table, LongTable, TableStyle, HRFlowable, KeepTogether,
+)
+
+from app.db import SessionLocal
+from app.models import ReportInfo
+from app.report_cache import report_store, ReportKey
+from app.feedback import feedback_service
+from app.charts import total_chart, scope_chart
+from app.rollup import period_sums
+from app.months import month_label
+from app.read_model import latest_report_info, iter_monthly_records
+from app.analytics import industry_benchmark
+from app.forecast import forecast_cache
+from app.instrumentation import span
+
+# 무거운 보고서 의존성(reportlab, 폰트)은 이 모듈에만 두고 app.routers.report가 처음 필요할 때 import한다
+
+FONT_PATH = "app/static/fonts/NanumHumanBold.ttf"
+FONT_NAME = "NanumHumanBold"
+LOGO_PATH = "app/static/img/탄탄대로 로고 누끼.png"
+
+_font_lock = threading.Lock()
+
+
+def ensure_font():
+    with _font_lock:
+        if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+
+
+def build_report(user_id: int):
+    db = SessionLocal()
+    try:
+        with span("report.build"):
+            info = latest_report_info(db, user_id)
+            if not info:
+                raise HTTPException(status_code=404, detail="사용자의 보고서 정보가 없습니다.")
+            return _build_report(db, user_id, info)
+    finally:
+        db.close()
+
+
+def render_report(report_id: int) -> dict:
+    """
+    (일괄 내보내기 작업 프로세스) 지정한 ReportInfo의 PDF를 만들어 (또는 캐시에서 꺼내) 내용과 함께 돌려준다.
+    사용자의 현재 보고서(/report/download)는 바꾸지 않는다.
+    """
+    db = SessionLocal()
+    try:
+        row = db.execute(
+            select(ReportInfo.user_id, ReportInfo.id, ReportInfo.company, ReportInfo.start_month,
+                   ReportInfo.end_month, ReportInfo.allowance)
+            .where(ReportInfo.id == report_id)
+        ).first()
+        if row is None:
+            return {"error": "보고서 정보가 없습니다."}
+        try:
+            result = _build_report(db, row.user_id, row, latest=False)
+        except HTTPException as e:
+            return {"error": e.detail}
+        with open(report_store.pdf_path(row.user_id, result["key"]), "rb") as f:
+            pdf = f.read()
+        return {"company": row.company, "start_month": row.start_month, "end_month": row.end_month, "pdf": pdf}
+    finally:
+        db.close()
+
+
+def _build_report(db: Session, user_id: int, info, latest: bool = True):
+    # 업종 비교는 다른 회사의 업로드로도 바뀌므로 키에 함께 넣는다
+    benchmark = industry_benchmark(db, user_id, info.start_month, info.end_month)
+    forecast = forecast_cache.get(db, user_id)
+    # 예측은 사용자의 최신 보고서 기준이므로 지난 보고서에는 넣지 않는다
+    if forecast is not None and forecast["report_id"] != info.id:
+        projection = "최신 보고서가 아니어서 기간 말 예측을 생략했습니다."
+    else:
+        projection = _forecast_line(forecast)
+
+    # 기간 기록은 한 번만 흘려 읽으며 캐시 키를 계산하고, 그래프/표에 쓰는 값만 남긴다 (Row 목록을 만들지 않는다)
+    key = ReportKey(info, _benchmark_line(benchmark) + projection)
+    months, total_emissions, scope1_list, scope2_list, table_rows = [], [], [], [], []
+    for r in iter_monthly_records(db, user_id, info.start_month, info.end_month):
+        key.update(r)
+        months.append(month_label(r.month))
+        total_emissions.append(r.total_emission or 0.0)
+        scope1_list.append(r.scope1 or 0.0)
+        scope2_list.append(r.scope2 or 0.0)
+        table_rows.append(_table_row(r))
+    if not months:
+        raise HTTPException(status_code=404, detail="해당 기간에 대한 배출 데이터가 없습니다.")
+
+    key = key.hexdigest()
+    cached = report_store.get(user_id, key, latest=latest)
+    # 규칙 기반 요약으로 만든 보고서는 LLM이 복구되면 다시 만든다
+    if cached is not None and cached.get("feedback_source") != "fallback":
+        return {**cached, "cached": True}
+
+    period = (month_label(info.start_month), month_label(info.end_month))
+
+    sums = period_sums(db, user_id, info.start_month, info.end_month)
+    total_sum, s1_sum, s2_sum = sums["total"], sums["scope1"], sums["scope2"]
+    remaining = round(info.allowance - total_sum, 2)
+
+    with span("report.charts"):
+        graph_total = total_chart(months, total_emissions, font_name=FONT_NAME)
+        graph_scope = scope_chart(months, scope1_list, scope2_list, font_name=FONT_NAME)
+
+
+    facts = {
+        "company": info.company,
+        "start_month": period[0],
+        "end_month": period[1],
+        "scope1": s1_sum,
+        "scope2": s2_sum,
+        "total": total_sum,
+        "remaining": remaining,
+        "monthly": dict(zip(months, [round(e, 2) for e in total_emissions])),
+    }
+    feedback_result = feedback_service.generate(facts)
+    feedback = feedback_result["text"]
+    feedback = feedback.replace('\\n',' ')
+
+    # PDF 작성
+    pdf_tmp = report_store.new_temp_path(user_id)
+    with span("report.pdf"):
+        _draw_pdf(pdf_tmp, info, period, (s1_sum, s2_sum, total_sum), remaining, benchmark, projection,
+                  table_rows, graph_total, graph_scope, feedback)
+
+    result = {
+        "message": "PDF generated successfully",
+        "feedback": feedback,
+        "feedback_source": feedback_result["source"],
+        "key": key
+    }
+    report_store.put(user_id, key, pdf_tmp, result, latest=latest)
+    return {**result, "cached": False}
+
+
+def _benchmark_line(benchmark: dict) -> str:
+    compared = [m for m in benchmark["months"] if "percentile" in m]
+    if not compared:
+        return "같은 업종의 비교 데이터가 부족합니다."
+    return (f"업종({benchmark['industry']}) 내 월 배출량 백분위 평균: {benchmark['average_percentile']}% "
+            f"({len(compared)}개월 비교, 낮을수록 배출이 적음)")
+
+
+def _forecast_line(forecast) -> str:
+    if forecast is None:
+        return "기간 말 예측에 쓸 월 기록이 없습니다."
+    if forecast["partial"]:
+        # 기간 끝이 너무 멀어 일부 달만 예측한 값이므로 구간 대신 빠진 달 수를 적는다
+        return (f"{forecast['projected_through']}까지 예상 잔여: {forecast['projected_balance']} kgCO₂ "
+                f"(기간 끝이 멀어 이후 {forecast['months_unprojected']}개월은 예측하지 않음, "
+                f"{forecast['as_of']}까지 기록 기준)")
+    if not forecast["months_ahead"]:
+        return f"기간 말 잔여: {forecast['projected_balance']} kgCO₂ (기간 전체 기록 있음)"
+    if forecast["balance_lower"] is None:
+        return (f"기간 말 예상 잔여: {forecast['projected_balance']} kgCO₂ "
+                f"(기록이 적어 예측 구간을 낼 수 없음, {forecast['as_of']}까지 기록 기준)")
+    return (f"기간 말 예상 잔여: {forecast['projected_balance']} kgCO₂ "
+            f"({round(forecast['interval'] * 100)}% 구간 {forecast['balance_lower']} ~ {forecast['balance_upper']}, "
+            f"{forecast['as_of']}까지 기록 기준)")
+
+
+class _Styles:
+    """보고서 전체가 같은 TTF 폰트 하나만 쓴다 (PDF에는 쓰인 글자만 골라 한 번 포함된다)."""
+
+    def __init__(self):
+        base = ParagraphStyle("base", fontName=FONT_NAME, bulletFontName=FONT_NAME, fontSize=10, leading=15)
+        self.title = ParagraphStyle("title", parent=base, fontSize=18, leading=22, alignment=TA_CENTER)
+        self.section = ParagraphStyle("section", parent=base, fontSize=12, leading=16, spaceBefore=6, spaceAfter=4)
+        self.body = ParagraphStyle("body", parent=base, leftIndent=20)
+        self.info = ParagraphStyle("info", parent=base, fontSize=12, leading=16)
+        self.info_right = ParagraphStyle("info_right", parent=self.info, alignment=TA_RIGHT)
+        self.feedback = ParagraphStyle("feedback", parent=base, leftIndent=10, spaceAfter=4)
+
+
+_styles = None
+
+
+def _get_styles() -> _Styles:
+    global _styles
+    if _styles is None:
+        _styles = _Styles()
+    return _styles
+
+
+def _number(value) -> str:
+    return "-" if value is None else f"{value:,.2f}"
+
+
+def _table_row(r) -> list:
+    return [month_label(r.month), r.company or "", _number(r.scope1), _number(r.scope2), _number(r.total_emission)]
+
+
+def _monthly_table(table_rows, width):
+    """월별 배출량 표. 머리글은 페이지마다 반복되고 행은 필요한 만큼 다음 페이지로 넘어간다."""
+    rows = [["월", "회사", "Scope 1", "Scope 2", "총배출 (kgCO₂)"], *table_rows]
+    # 열 너비를 고정해 두면 긴 표도 내용을 훑어 너비를 재지 않는다
+    col_widths = [w * width for w in (0.14, 0.32, 0.17, 0.17, 0.20)]
+    table = LongTable(rows, colWidths=col_widths, repeatRows=1)
+    table.setStyle(TableStyle([
+        ("FONTNAME", (0, 0), (-1, -1), FONT_NAME),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e0f7e9")),
+        ("LINEBELOW", (0, 0), (-1, 0), 0.8, colors.HexColor("#28a745")),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f6f6f6")]),
+        ("ALIGN", (2, 0), (-1, -1), "RIGHT"),
+        ("TOPPADDING", (0, 0), (-1, -1), 2),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+    ]))
+    return table
+
+
+def _page_number(c, doc):
+    c.saveState()
+    c.setFont(FONT_NAME, 8)
+    c.drawCentredString(A4[0] / 2, 20, f"- {doc.page} -")
+    c.restoreState()
+
+
+def _draw_pdf(path, info, period, sums, remaining, benchmark, projection, table_rows, graph_total, graph_scope, feedback):
+    s1_sum, s2_sum, total_sum = sums
+    st = _get_styles()
+    margin = 40
+    doc = SimpleDocTemplate(
+        path, pagesize=A4, leftMargin=margin, rightMargin=margin, topMargin=20, bottomMargin=40,
+        title="탄소 배출 보고서", author=info.company or "", initialFontName=FONT_NAME,
+    )
+    width = doc.width
+
+    def rule(thickness=1):
+        return HRFlowable(width="100%", thickness=thickness, color=colors.black, spaceBefore=4, spaceAfter=8)
+
+    def section(title, *flowables):
+        # 제목만 페이지 끝에 남지 않도록 첫 내용과 함께 둔다
+        return KeepTogether([Paragraph(title, st.section), *flowables])
+
+    status = f"기준초과: {abs(remaining)} kgCO₂" if remaining < 0 else f"기준미만: {remaining} kgCO₂"
+    story = [
+        # 로고, 제목
+        Image(LOGO_PATH, width=86, height=25, mask="auto"),
+        Spacer(1, 4),
+        Paragraph("탄소 배출 보고서", st.title),
+        rule(2),
+        # 기업 및 기간
+        Table(
+            [[Paragraph(escape(f"기업: {info.company}"), st.info),
+              Paragraph(f"기간: {period[0]} ~ {period[1]}", st.info_right)]],
+            colWidths=[width / 2, width / 2],
+            style=[("FONTNAME", (0, 0), (-1, -1), FONT_NAME),
+                   ("LEFTPADDING", (0, 0), (0, 0), 10), ("RIGHTPADDING", (-1, 0), (-1, 0), 10)],
+        ),
+        rule(),
+        section(
+            "[Scope별 요약]",
+            Paragraph(f"Scope 1: {round(s1_sum, 2)} kgCO₂", st.body),
+            Paragraph(f"Scope 2: {round(s2_sum, 2)} kgCO₂", st.body),
+            Paragraph(f"총배출: {round(total_sum, 2)} kgCO₂", st.body),
+        ),
+        rule(),
+        section(
+            "[규제 초과 여부]",
+            Paragraph(status, st.body),
+            Paragraph(escape(projection), st.body),
+            Paragraph(escape(_benchmark_line(benchmark)), st.body),
+        ),
+        rule(),
+        section("[총배출 그래프]", graph_total),
+        Spacer(1, 10),
+        section("[Scope 1 & 2 그래프]", graph_scope),
+        rule(),
+        Paragraph("[월별 배출량]", st.section),
+        _monthly_table(table_rows, width),
+        rule(),
+        Paragraph("[GPT 피드백]", st.section),
+    ]
+    # 긴 피드백은 문단 단위로 줄바꿈되고 다음 페이지로 이어진다
+    story.extend(Paragraph(escape(para), st.feedback) for para in feedback.splitlines() if para.strip())
+
+    doc.build(story, onFirstPage=_page_number, onLaterPages=_page_number)
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from app import config
+
+# 보고서 레이아웃이 바뀌면 올려서 기존 캐시를 무효화한다
+LAYOUT_VERSION = 5
+
+
+class ReportKey:
+    """ReportInfo 기간/허용량과 해당 기간 EmissionRecord 행(및 extra)으로 만든 내용 해시. 행은 하나씩 흘려 넣는다."""
+
+    def __init__(self, info, extra: str = ""):
+        self._h = hashlib.sha256()
+        self._h.update(
+            f"v{LAYOUT_VERSION}|{info.company}|{info.start_month}|{info.end_month}|{info.allowance!r}|{extra}\n".encode()
+        )
+
+    def update(self, r):
+        self._h.update(
+            f"{r.month}|{r.company}|{r.electricity!r}|{r.gasoline!r}|{r.natural_gas!r}|"
+            f"{r.district_heating!r}|{r.total_emission!r}\n".encode()
+        )
+
+    def hexdigest(self) -> str:
+        return self._h.hexdigest()[:32]
+
+
+def report_key(info, records, extra: str = "") -> str:
+    key = ReportKey(info, extra)
+    for r in records:
+        key.update(r)
+    return key.hexdigest()
+
+
+class ReportStore:
+    """사용자별 디렉터리에 <key>.pdf / <key>.json 을 저장하고 전체 용량을 넘으면 오래된 것부터 지운다."""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _user_dir(self, user_id: int) -> str:
+        path = os.path.join(self.root, str(int(user_id)))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def pdf_path(self, user_id: int, key: str) -> str:
+        return os.path.join(self._user_dir(user_id), f"{key}.pdf")
+
+    def _meta_path(self, user_id: int, key: str) -> str:
+        return os.path.join(self._user_dir(user_id), f"{key}.json")
+
+    def _set_latest(self, user_id: int, key: str):
+        path = os.path.join(self._user_dir(user_id), "latest")
+        with open(path + ".tmp", "w") as f:
+            f.write(key)
+        os.replace(path + ".tmp", path)
+
+    def get(self, user_id: int, key: str, latest: bool = True):
+        """캐시 적중 시 저장해 둔 메타데이터를 돌려주고 LRU 순서를 갱신한다. latest=False면 현재 보고서는 그대로 둔다."""
+        pdf, meta = self.pdf_path(user_id, key), self._meta_path(user_id, key)
+        try:
+            with open(meta) as f:
+                data = json.load(f)
+            os.utime(pdf)
+        except (FileNotFoundError, ValueError):
+            return None
+        if latest:
+            self._set_latest(user_id, key)
+        return data
+
+    def new_temp_path(self, user_id: int) -> str:
+        fd, path = tempfile.mkstemp(suffix=".pdf.tmp", dir=self._user_dir(user_id))
+        os.close(fd)
+        return path
+
+    def put(self, user_id: int, key: str, tmp_pdf: str, meta: dict, latest: bool = True):
+        os.replace(tmp_pdf, self.pdf_path(user_id, key))
+        with open(self._meta_path(user_id, key), "w") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        if latest:
+            self._set_latest(user_id, key)
+        self.evict()
+
+    def latest(self, user_id: int):
+        """(key, pdf 경로) 또는 None"""
+        try:
+            with open(os.path.join(self._user_dir(user_id), "latest")) as f:
+                key = f.read().strip()
+        except FileNotFoundError:
+            return None
+        path = self.pdf_path(user_id, key)
+        return (key, path) if os.path.exists(path) else None
+
+    def _latest_keys(self):
+        keys = set()
+        for user in os.listdir(self.root):
+            try:
+                with open(os.path.join(self.root, user, "latest")) as f:
+                    keys.add((user, f.read().strip()))
+            except (FileNotFoundError, NotADirectoryError):
+                pass
+        return keys
+
+    def evict(self):
+        with self._lock:
+            entries, total = [], 0
+            for user in os.listdir(self.root):
+                user_dir = os.path.join(self.root, user)
+                if not os.path.isdir(user_dir):
+                    continue
+                for name in os.listdir(user_dir):
+                    if not name.endswith(".pdf"):
+                        continue
+                    try:
+                        st = os.stat(os.path.join(user_dir, name))
+                    except FileNotFoundError:
+                        # 다른 프로세스(서버 워커, 일괄 내보내기)가 먼저 지운 경우
+                        continue
+                    entries.append((st.st_mtime, st.st_size, user, name[:-4]))
+                    total += st.st_size
+            if total <= self.max_bytes:
+                return
+            # 각 사용자의 현재 보고서는 남겨 둔다
+            keep = self._latest_keys()
+            for _, size, user, key in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if (user, key) in keep:
+                    continue
+                for ext in (".pdf", ".json"):
+                    try:
+                        os.remove(os.path.join(self.root, user, key + ext))
+                    except FileNotFoundError:
+                        pass
+                total -= size
+
+
+report_store = ReportStore(config.REPORT_CACHE_DIR, config.REPORT_CACHE_MAX_BYTES)
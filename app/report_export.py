@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import re
+import zipfile
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import config
+from app.models import ReportInfo
+from app.months import month_label
+from app.process_pool import ProcessPool
+
+logger = logging.getLogger(__name__)
+
+# 여러 회사의 보고서 PDF를 한 번에 내려받는다.
+# PDF는 프로세스 풀에서 만들고 (작업 프로세스마다 폰트는 처음 한 번만 등록), 끝나는 순서대로 ZIP 항목으로 흘려보낸다.
+# 응답 전체를 메모리에 모으지 않으므로 한 번에 들고 있는 것은 PDF 몇 개 분량뿐이다.
+
+def _init_worker():
+    from app import report_builder
+    report_builder.ensure_font()
+
+
+def _render(report_id: int) -> dict:
+    from app import report_builder
+    return report_builder.render_report(report_id)
+
+
+# 작업 프로세스가 죽어 풀이 깨지면 새 풀에서 그 보고서를 한 번 더 만든다
+_pool = ProcessPool(config.REPORT_EXPORT_PROCESSES, initializer=_init_worker, name="report export")
+
+
+def shutdown():
+    _pool.shutdown()
+
+
+def is_consultant(email: str) -> bool:
+    return bool(email) and email.strip().lower() in config.REPORT_EXPORT_CONSULTANTS
+
+
+async def select_reports(db: AsyncSession, user_id: int, email: str, report_ids) -> list:
+    """내보낼 보고서 id 목록. 컨설턴트(REPORT_EXPORT_CONSULTANTS)는 모든 회사, 그 밖의 사용자는 자기 보고서만."""
+    report_ids = list(dict.fromkeys(report_ids))
+    if not report_ids:
+        raise HTTPException(status_code=400, detail="내보낼 보고서를 선택해 주세요.")
+    if len(report_ids) > config.REPORT_EXPORT_MAX:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {config.REPORT_EXPORT_MAX}개 보고서까지 내보낼 수 있습니다.")
+    stmt = select(ReportInfo.id).where(ReportInfo.id.in_(report_ids))
+    if not is_consultant(email):
+        stmt = stmt.where(ReportInfo.user_id == user_id)
+    found = set((await db.scalars(stmt)).all())
+    missing = [i for i in report_ids if i not in found]
+    if missing:
+        # 다른 회사의 보고서가 있는지는 알려 주지 않는다
+        raise HTTPException(status_code=404, detail=f"보고서를 찾을 수 없습니다: {', '.join(map(str, missing))}")
+    return report_ids
+
+
+class _Sink:
+    """ZipFile이 쓰는 바이트를 모아 두었다가 응답으로 넘긴다 (seek할 수 없는 스트림)."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _file_name(report_id: int, parsed: dict) -> str:
+    company = re.sub(r'[\\/:*?"<>|\s]+', "_", parsed["company"] or "").strip("_") or "company"
+    return f"{report_id}_{company}_{month_label(parsed['start_month'])}_{month_label(parsed['end_month'])}.pdf"
+
+
+async def stream_zip(report_ids):
+    """PDF가 끝나는 대로 ZIP 항목을 내보내는 비동기 생성기. 실패한 보고서는 마지막에 errors.txt로 적는다."""
+    async def render(report_id):
+        try:
+            return report_id, await _pool.run(_render, report_id)
+        except Exception as e:
+            logger.exception("report export failed for report=%s", report_id)
+            return report_id, {"error": f"생성 실패: {e}"}
+
+    tasks = [asyncio.ensure_future(render(i)) for i in report_ids]
+    sink = _Sink()
+    errors = []
+    try:
+        # PDF는 이미 압축되어 있으므로 다시 압축하지 않는다
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as zf:
+            for next_done in asyncio.as_completed(tasks):
+                report_id, parsed = await next_done
+                if "error" in parsed:
+                    errors.append(f"{report_id}: {parsed['error']}")
+                    continue
+                zf.writestr(_file_name(report_id, parsed), parsed["pdf"])
+                yield sink.drain()
+            if errors:
+                zf.writestr("errors.txt", "\n".join(errors) + "\n")
+        yield sink.drain()
+    finally:
+        # 클라이언트가 끊으면 아직 시작하지 않은 보고서는 만들지 않는다
+        for task in tasks:
+            task.cancel()
+    logger.info("report export finished: %d reports, %d failed", len(report_ids), len(errors))
@@ -0,0 +1,99 @@
+import numpy as np
+from sqlalchemy import select, delete, func, insert
+from sqlalchemy.orm import Session
+
+from app.models import EmissionRecord, EmissionRollup
+from app.analytics import apply_rollup_change, reset_sketches, user_monthly_values
+
+METRICS = ["total", "scope1", "scope2"]
+_CUM_COLUMNS = [EmissionRollup.cum_total, EmissionRollup.cum_scope1, EmissionRollup.cum_scope2]
+
+
+def _cumulative_before(db: Session, user_id: int, month: int):
+    """month 직전까지의 누적합 (total, scope1, scope2)"""
+    row = db.execute(
+        select(*_CUM_COLUMNS)
+        .where(EmissionRollup.user_id == user_id, EmissionRollup.month < month)
+        .order_by(EmissionRollup.month.desc())
+        .limit(1)
+    ).first()
+    return tuple(row) if row else (0.0, 0.0, 0.0)
+
+
+def _cumulative_through(db: Session, user_id: int, month: int):
+    row = db.execute(
+        select(*_CUM_COLUMNS)
+        .where(EmissionRollup.user_id == user_id, EmissionRollup.month <= month)
+        .order_by(EmissionRollup.month.desc())
+        .limit(1)
+    ).first()
+    return tuple(row) if row else (0.0, 0.0, 0.0)
+
+
+def rebuild_rollup(db: Session, user_id: int, since: int = None) -> int:
+    """since 이후 달의 월 합계/누적합을 다시 만든다. 그 이전 달은 건드리지 않는다 (커밋은 호출자가 한다)."""
+    base = _cumulative_before(db, user_id, since) if since is not None else (0.0, 0.0, 0.0)
+
+    stmt = (
+        select(
+            EmissionRecord.month,
+            func.coalesce(func.sum(EmissionRecord.total_emission), 0.0),
+            func.coalesce(func.sum(EmissionRecord.scope1), 0.0),
+            func.coalesce(func.sum(EmissionRecord.scope2), 0.0),
+        )
+        .where(EmissionRecord.user_id == user_id)
+        .group_by(EmissionRecord.month)
+        .order_by(EmissionRecord.month)
+    )
+    cleanup = delete(EmissionRollup).where(EmissionRollup.user_id == user_id)
+    if since is not None:
+        stmt = stmt.where(EmissionRecord.month >= since)
+        cleanup = cleanup.where(EmissionRollup.month >= since)
+
+    # 업종 스케치는 바뀐 달의 옛 값/새 값 차이만 반영한다
+    before = user_monthly_values(db, user_id, since)
+    rows = db.execute(stmt).all()
+    db.execute(cleanup)
+    after = {}
+    if rows:
+        values = np.array([r[1:] for r in rows], dtype="float64")
+        cumulative = np.cumsum(values, axis=0) + np.array(base)
+        db.execute(insert(EmissionRollup), [
+            {
+                "user_id": user_id,
+                "month": r[0],
+                "total": v[0], "scope1": v[1], "scope2": v[2],
+                "cum_total": c[0], "cum_scope1": c[1], "cum_scope2": c[2],
+            }
+            for r, v, c in zip(rows, values.tolist(), cumulative.tolist())
+        ])
+        after = {r[0]: tuple(v) for r, v in zip(rows, values.tolist())}
+    apply_rollup_change(db, user_id, before, after)
+    return len(rows)
+
+
+def rebuild_all(db: Session, since: int = None):
+    user_ids = db.execute(select(EmissionRecord.user_id).distinct()).scalars().all()
+    if since is None:
+        db.execute(delete(EmissionRollup))
+        reset_sketches(db)
+    for user_id in user_ids:
+        rebuild_rollup(db, user_id, since)
+
+
+def period_sums(db: Session, user_id: int, start_month: int, end_month: int) -> dict:
+    """기간 합계 {total, scope1, scope2} — 인덱스 조회 두 번."""
+    through = _cumulative_through(db, user_id, end_month)
+    before = _cumulative_before(db, user_id, start_month)
+    return {m: round(a - b, 2) for m, a, b in zip(METRICS, through, before)}
+
+
+def cumulative_total_at(user_id_column, month_condition):
+    """ReportInfo 같은 외부 쿼리에 상관 서브쿼리로 끼워 넣을 수 있는 누적 total 조회."""
+    return (
+        select(EmissionRollup.cum_total)
+        .where(EmissionRollup.user_id == user_id_column, month_condition)
+        .order_by(EmissionRollup.month.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
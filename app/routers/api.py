@@ -0,0 +1,138 @@
+import asyncio
+import datetime
+import hashlib
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import APIRouter, Request, Depends, HTTPException, UploadFile, File
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import get_async_db
+from app.balance import matching_summary_committed
+from app.bulk_ingest import ingest_bulk
+from app.data_version import EPOCH, user_version, balances_version
+from app.analytics import METRICS, industry_benchmark, sketches_updated_at
+from app.months import form_month, month_label
+from app.read_model import latest_report_info, monthly_dashboard
+
+# 대시보드용 JSON API. 응답은 사용자의 마지막 데이터 변경으로 만든 ETag/Last-Modified를 달고,
+# 바뀌지 않았으면 본문 없이 304를 돌려준다.
+router = APIRouter(prefix="/api/v1", tags=["api"], default_response_class=ORJSONResponse)
+
+
+def _user_id(request: Request) -> int:
+    user_id = request.session.get("user_id")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="로그인이 필요합니다.")
+    return user_id
+
+
+def _validators(parts, updated_at: datetime.datetime) -> dict:
+    digest = hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:20]
+    return {
+        "ETag": f'W/"{digest}"',
+        "Last-Modified": format_datetime(updated_at.replace(tzinfo=datetime.timezone.utc), usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+
+
+def _not_modified(request: Request, headers: dict) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return headers["ETag"] in tags or "*" in tags
+    # ETag가 없는 클라이언트만 날짜로 비교한다 (HTTP 날짜는 초 단위)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(headers["Last-Modified"]) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def _period(db: AsyncSession, user_id: int, start: str, end: str):
+    """쿼리의 start/end(YYYY-MM)를 키로 바꾼다. 없으면 가장 최근 보고서 기간을 쓴다."""
+    if start and end:
+        return form_month(start), form_month(end)
+    info = await db.run_sync(latest_report_info, user_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="보고서 정보가 없습니다.")
+    return form_month(start) if start else info.start_month, form_month(end) if end else info.end_month
+
+
+async def _monthly_response(request: Request, db: AsyncSession, start: str, end: str, field: str,
+                            unique_months: bool):
+    user_id = _user_id(request)
+    start_key, end_key = await _period(db, user_id, start, end)
+    version, updated_at = await db.run_sync(user_version, user_id)
+    headers = _validators((field, user_id, version, start_key, end_key, unique_months), updated_at)
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+
+    # 기본은 회사별 기록을 모두 돌려준다. unique_months면 같은 달은 첫 회사의 행만 쓴다
+    results, scopes = await db.run_sync(monthly_dashboard, user_id, start_key, end_key, unique_months)
+    return ORJSONResponse({
+        "start": month_label(start_key),
+        "end": month_label(end_key),
+        field: results if field == "results" else scopes,
+    }, headers=headers)
+
+
+@router.get("/emissions/monthly")
+async def monthly_results(request: Request, start: str = None, end: str = None, unique_months: bool = False,
+                          db: AsyncSession = Depends(get_async_db)):
+    return await _monthly_response(request, db, start, end, "results", unique_months)
+
+
+@router.get("/emissions/scopes")
+async def scope_breakdown(request: Request, start: str = None, end: str = None, unique_months: bool = False,
+                          db: AsyncSession = Depends(get_async_db)):
+    return await _monthly_response(request, db, start, end, "scopes", unique_months)
+
+
+@router.get("/benchmarks/industry")
+async def industry_percentiles(request: Request, start: str = None, end: str = None, metric: str = "total",
+                               db: AsyncSession = Depends(get_async_db)):
+    """같은 업종 안에서 내 월 배출량의 위치 (업종/월별 분위수 스케치 기반)"""
+    if metric not in METRICS:
+        raise HTTPException(status_code=400, detail="metric은 total, scope1, scope2 중 하나입니다.")
+    user_id = _user_id(request)
+    start_key, end_key = await _period(db, user_id, start, end)
+    version, updated_at = await db.run_sync(user_version, user_id)
+    # 다른 회사의 업로드로도 바뀌므로 업종 스케치의 갱신 시각을 함께 쓴다
+    peers_updated_at = await db.run_sync(sketches_updated_at, user_id) or EPOCH
+    headers = _validators(
+        ("benchmark", user_id, metric, version, start_key, end_key, peers_updated_at.isoformat()),
+        max(updated_at, peers_updated_at),
+    )
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+
+    benchmark = await db.run_sync(industry_benchmark, user_id, start_key, end_key, metric)
+    return ORJSONResponse({"start": month_label(start_key), "end": month_label(end_key), **benchmark}, headers=headers)
+
+
+@router.get("/matching")
+async def matching(request: Request, page: int = 1, db: AsyncSession = Depends(get_async_db)):
+    # 매칭 목록은 다른 사용자의 잔여 배출권에도 달려 있다
+    user_id = _user_id(request)
+    count, balances_updated_at = await db.run_sync(balances_version)
+    version, updated_at = await db.run_sync(user_version, user_id)
+    headers = _validators(
+        ("matching", user_id, page, version, count, balances_updated_at.isoformat()),
+        max(updated_at, balances_updated_at),
+    )
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+
+    # 잔여량 동기화와 예측 적합은 작업 스레드에서 동기 세션으로 한다
+    summary = await asyncio.to_thread(matching_summary_committed, user_id, page)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="보고서 정보가 없습니다.")
+    return ORJSONResponse(summary, headers=headers)
+
+
+@router.post("/emissions/bulk")
+async def bulk_upload(request: Request, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    """ZIP(파일 = 회사) 또는 여러 시트 엑셀(시트 = 회사)을 받아 회사별 처리 결과를 돌려준다."""
+    return await ingest_bulk(db, file, _user_id(request))
@@ -2,28 +2,17 @@
 
 from fastapi import APIRouter, Request, Form, Depends, status
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-from ..db import SessionLocal
+from ..db import get_db
 from .. import crud
 from .. import schemas
+from ..templating import templates
 
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-templates = Jinja2Templates(directory="templates")
-
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("/login")
 def login_get(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
@@ -0,0 +1,24 @@
+import os
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import get_async_db
+from app.jobs import report_jobs
+
+router = APIRouter()
+
+
+@router.get("/ready", include_in_schema=False)
+async def ready(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """로드밸런서용 준비 상태. 시작 전/종료 중이거나 DB에 닿지 않으면 503."""
+    body = {"pid": os.getpid(), "jobs": report_jobs.stats()}
+    if not getattr(request.app.state, "ready", False) or report_jobs.closed:
+        return JSONResponse({"status": "unavailable", **body}, status_code=503)
+    try:
+        await db.execute(text("SELECT 1"))
+    except SQLAlchemyError:
+        return JSONResponse({"status": "database unavailable", **body}, status_code=503)
+    return {"status": "ready", **body}
@@ -2,10 +2,9 @@
 
 from fastapi import APIRouter, Request
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
+from app.templating import templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")  
 
 @router.get("/")
 def home(request: Request):
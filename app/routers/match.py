@@ -1,22 +1,14 @@
-from fastapi import APIRouter, Request, Depends, HTTPException
+import asyncio
+
+from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from app.db import SessionLocal
-from app.models import User, EmissionRecord, ReportInfo
+from app.balance import matching_summary_committed
+from app.templating import templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 @router.get("/matching")
-def match_page(request: Request, db: Session = Depends(get_db)):
+async def match_page(request: Request, page: int = 1):
     user_id = request.session.get("user_id")
     user_email = request.session.get("user_email")
 
@@ -24,70 +16,12 @@ def match_page(request: Request, db: Session = Depends(get_db)):
 
         return RedirectResponse(url="/auth/login", status_code=303)
 
-    user = db.query(User).filter(User.id == user_id).first()
-    report = db.query(ReportInfo).filter(ReportInfo.user_id == user_id).order_by(ReportInfo.id.desc()).first()
-    if not report:
+    summary = await asyncio.to_thread(matching_summary_committed, user_id, page)
+    if summary is None:
         raise HTTPException(status_code=404, detail="보고서 정보가 없습니다.")
 
-
-
-    company_name = report.company
-    if not company_name:
-        first_record = db.query(EmissionRecord).filter(EmissionRecord.user_id == user_id).first()
-        if first_record:
-            company_name = first_record.company
-        else:
-            company_name = "(미입력)"#
-
-    records = db.query(EmissionRecord).filter(
-        EmissionRecord.user_id == user_id,
-        EmissionRecord.month >= report.start_month,
-        EmissionRecord.month <= report.end_month
-    ).all()
-
-    total_emission = sum([r.total_emission for r in records])
-    remaining = round(report.allowance - total_emission, 2)
-    status = "남은 배출권" if remaining > 0 else "초과 배출량"
-    status_value = abs(remaining)
-
-    all_reports = db.query(ReportInfo).all()
-    company_emissions = []
-    for rep in all_reports:
-        rep_user = db.query(User).filter(User.id == rep.user_id).first()
-
-        rep_records = db.query(EmissionRecord).filter(
-            EmissionRecord.user_id == rep.user_id,
-            EmissionRecord.month >= rep.start_month,
-            EmissionRecord.month <= rep.end_month
-        ).all()
-        emission_sum = sum([r.total_emission for r in rep_records])
-        difference = round(rep.allowance - emission_sum, 2)
-
-
-        rep_company_name = rep.company
-        if not rep_company_name:
-            first_rec = db.query(EmissionRecord).filter(EmissionRecord.user_id == rep.user_id).first()
-            rep_company_name = first_rec.company if first_rec else "(미입력)"
-
-        company_emissions.append({
-            "id": rep.user_id,
-            "email": rep_user.email,
-            "company": rep_company_name,
-            "industry": rep_user.industry,
-            "difference": difference
-        })
-
-
-    excess_companies = [c for c in company_emissions if c["difference"] < 0 and c["id"] != user_id]
-    remaining_companies = [c for c in company_emissions if c["difference"] > 0 and c["id"] != user_id]
-
     return templates.TemplateResponse("match.html", {
         "request": request,
         "user_email": user_email,
-        "user_company": company_name,
-        "user_industry": user.industry,
-        "status": status,
-        "status_value": status_value,
-        "excess_companies": excess_companies,
-        "remaining_companies": remaining_companies
+        **summary
     })
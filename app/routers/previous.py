@@ -1,20 +1,15 @@
 from fastapi import APIRouter, Form, Request, Depends, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from app.db import SessionLocal
-from app.models import EmissionRecord, ReportInfo
-import json
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import get_async_db
+from app.models import ReportInfo
+from app.balance import refresh_balances
+from app.data_version import touch
+from app.months import form_month, month_label
+from app.read_model import has_records
+from app.templating import templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 @router.get("/previous", response_class=HTMLResponse)
 def previous_page(request: Request):
@@ -25,62 +20,43 @@ def previous_page(request: Request):
     })
 
 @router.post("/previous", response_class=HTMLResponse)
-def run_previous_analysis(
+async def run_previous_analysis(
     request: Request,
     start_month: str = Form(...),
     end_month: str = Form(...),
     allowance: float = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     user_id = request.session.get("user_id")
     user_email = request.session.get("user_email")
     if not user_id:
         return RedirectResponse(url="/auth/login", status_code=303)
+    start_key, end_key = form_month(start_month), form_month(end_month)
 
 
 
     db.add(ReportInfo(
         user_id=user_id,
         company="",  
-        start_month=start_month,
-        end_month=end_month,
+        start_month=start_key,
+        end_month=end_key,
         allowance=allowance
     ))
-    db.commit()
-
-    records = db.query(EmissionRecord).filter(
-        EmissionRecord.user_id == user_id,
-        EmissionRecord.month >= start_month,
-        EmissionRecord.month <= end_month
-    ).order_by(EmissionRecord.month).all()
+    await db.run_sync(refresh_balances, user_id)
+    await db.run_sync(touch, user_id)
+    await db.commit()
 
-    if not records:
+    if not await db.run_sync(has_records, user_id, start_key, end_key):
         return templates.TemplateResponse("previous.html", {
             "request": request,
             "user_email": user_email,
             "error": "해당 기간에 대한 데이터가 없습니다."
         })
 
-    results, scopes = [], []
-    for r in records:
-        results.append({
-            "month": r.month,
-            "electricity": r.electricity,
-            "gasoline": r.gasoline,
-            "natural_gas": r.natural_gas,
-            "district_heating": r.district_heating,
-            "total_emission": r.total_emission
-        })
-        scopes.append({
-            "month": r.month,
-            "scope1": round(r.gasoline * 2.31 + r.natural_gas * 0.203, 2),
-            "scope2": round(r.electricity * 0.417 + r.district_heating * 110, 2)
-        })
-
     return templates.TemplateResponse("previous.html", {
         "request": request,
         "user_email": user_email,
-        "results": json.dumps(results, default=str),
-        "scopes": json.dumps(scopes, default=str),
+        # 차트 데이터는 페이지가 /api/v1/emissions/* 에서 가져간다
+        "period": {"start": month_label(start_key), "end": month_label(end_key)},
         "allowance": allowance
     })
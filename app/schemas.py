@@ -45,5 +45,5 @@ class ReportInfoBase(BaseModel):
     allowance: float
 
 
-
-
+class ReportExportRequest(BaseModel):
+    report_ids: list[int]
@@ -0,0 +1,134 @@
+"""
+운영용 실행 (pre-fork)
+
+    python run.py --prod [--workers N] [--host H] [--port P]
+
+부모 프로세스가 스키마/마이그레이션과 선로딩(템플릿, 폰트, 배출계수표, 자산 빌드)을 한 번 마친 뒤
+리스닝 소켓을 열고 워커를 fork한다. 워커는 물려받은 DB 연결 풀을 버리고 자기 연결을 새로 만든다.
+SIGTERM/SIGINT를 받으면 워커에 SIGTERM을 보내고, 워커는 진행 중인 요청과 보고서 작업을
+SHUTDOWN_DRAIN_SECONDS까지 마무리한 뒤 끝난다. 워커가 비정상 종료하면 다시 띄운다.
+보고서 작업 상태는 DB(report_jobs)에 있으므로 제출과 조회가 서로 다른 워커로 가도 된다.
+"""
+import logging
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+from app import config
+
+logger = logging.getLogger("app.server")
+
+RESPAWN_DELAY = 1.0
+
+
+def _listen(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _worker(app, sock: socket.socket):
+    from app.db import engine, async_engine
+
+    # fork 직후: 부모가 연 연결을 두 프로세스가 함께 쓰지 않도록 풀만 버린다 (부모 쪽 연결은 닫지 않는다)
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    server = uvicorn.Server(uvicorn.Config(
+        app, lifespan="on", timeout_graceful_shutdown=config.SHUTDOWN_DRAIN_SECONDS,
+    ))
+    server.run(sockets=[sock])
+
+
+def _spawn(app, sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    # 터미널의 Ctrl+C는 부모만 받게 하고, 종료 신호는 부모가 한 번만 전달한다
+    os.setpgid(0, 0)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    code = 0
+    try:
+        _worker(app, sock)
+    except BaseException:
+        logger.exception("worker %d crashed", os.getpid())
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def _stop(children: set, timeout: float):
+    for pid in children:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    deadline = time.monotonic() + timeout
+    while children and time.monotonic() < deadline:
+        pid, _ = os.waitpid(-1, os.WNOHANG)
+        if pid:
+            children.discard(pid)
+        else:
+            time.sleep(0.1)
+    for pid in children:
+        logger.warning("worker %d did not stop in %.0fs, killing", pid, timeout)
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+
+
+def run(host: str = None, port: int = None, workers: int = None):
+    host = host or config.SERVER_HOST
+    port = port or config.SERVER_PORT
+    workers = max(1, workers or config.SERVER_WORKERS)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(name)s %(levelname)s %(message)s")
+
+    from app import main
+
+    if not hasattr(os, "fork"):
+        # Windows: fork가 없으므로 uvicorn 자체 워커(spawn)를 쓴다. 선로딩은 워커마다 따로 한다
+        main.prepare()
+        uvicorn.run("app.main:app", host=host, port=port, workers=workers,
+                    timeout_graceful_shutdown=config.SHUTDOWN_DRAIN_SECONDS)
+        return
+
+    started = time.perf_counter()
+    main.preload()
+    # 부모는 더 이상 DB를 쓰지 않으므로 fork 전에 연결을 모두 닫는다
+    main.engine.dispose()
+    logger.info("preloaded in %.2fs, starting %d workers on %s:%d", time.perf_counter() - started, workers, host, port)
+
+    sock = _listen(host, port)
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    children = {_spawn(main.app, sock) for _ in range(workers)}
+
+    while not stopping:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if not pid:
+            time.sleep(0.2)
+            continue
+        children.discard(pid)
+        if stopping:
+            break
+        logger.warning("worker %d exited with status %d, restarting", pid, os.waitstatus_to_exitcode(status))
+        time.sleep(RESPAWN_DELAY)
+        children.add(_spawn(main.app, sock))
+
+    logger.info("shutting down %d workers", len(children))
+    # 워커의 요청/작업 마무리 시간에 여유를 조금 더 준다
+    _stop(children, config.SHUTDOWN_DRAIN_SECONDS + 5)
+    sock.close()
@@ -0,0 +1,103 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, nodes
+from jinja2.ext import Extension
+
+from app import config
+from app.assets import install_template_helpers
+
+logger = logging.getLogger(__name__)
+
+# 모든 라우터가 함께 쓰는 템플릿 환경.
+# 컴파일 결과는 TEMPLATE_CACHE_DIR에 바이트코드로 남겨 새 워커가 다시 파싱하지 않게 하고,
+# 페이지의 정적인 부분은 {% cache "이름", 키... %} ... {% endcache %} 로 렌더 결과를 재사용한다.
+
+
+class FragmentCache:
+    """(템플릿, 조각 이름, 키...) -> 렌더된 문자열. 프로세스 안 LRU."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value: str):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+fragment_cache = FragmentCache(config.TEMPLATE_FRAGMENT_CACHE_MAX)
+
+
+class FragmentCacheExtension(Extension):
+    """{% cache "navbar", user_email %} ... {% endcache %} — 같은 키면 안쪽을 다시 렌더하지 않는다."""
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        key = nodes.Tuple([nodes.Const(parser.name)] + args, "load")
+        return nodes.CallBlock(self.call_method("_cached", [key]), [], [], body).set_lineno(lineno)
+
+    def _cached(self, key, caller):
+        if not config.TEMPLATE_FRAGMENT_CACHE:
+            return caller()
+        value = fragment_cache.get(key)
+        if value is None:
+            value = caller()
+            fragment_cache.put(key, value)
+        return value
+
+
+def _bytecode_cache():
+    if not config.TEMPLATE_CACHE_DIR:
+        return None
+    os.makedirs(config.TEMPLATE_CACHE_DIR, exist_ok=True)
+    return FileSystemBytecodeCache(config.TEMPLATE_CACHE_DIR)
+
+
+env = Environment(
+    loader=FileSystemLoader("templates"),
+    autoescape=True,
+    bytecode_cache=_bytecode_cache(),
+    auto_reload=config.TEMPLATE_AUTO_RELOAD,
+    extensions=[FragmentCacheExtension],
+)
+templates = Jinja2Templates(env=env)
+install_template_helpers(env)
+
+
+def precompile() -> int:
+    """모든 템플릿을 미리 컴파일해 메모리/바이트코드 캐시에 올린다 (시작 시 한 번)."""
+    started = time.perf_counter()
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    logger.info("precompiled %d templates in %.3fs", len(names), time.perf_counter() - started)
+    return len(names)
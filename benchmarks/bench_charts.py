@@ -0,0 +1,101 @@
+"""
+PDF 그래프 렌더링 비교: 기존 matplotlib PNG 왕복 vs reportlab 벡터 그래프
+
+    python -m benchmarks.bench_charts [개월 수] [반복 횟수]
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.graphics import renderPDF
+
+from app.charts import total_chart, scope_chart
+
+
+def sample(n_months):
+    months = [f"{2000 + i // 12}-{i % 12 + 1:02d}" for i in range(n_months)]
+    s1 = [100 + (i * 37) % 50 for i in range(n_months)]
+    s2 = [300 + (i * 53) % 120 for i in range(n_months)]
+    total = [a + b for a, b in zip(s1, s2)]
+    return months, total, s1, s2
+
+
+def matplotlib_page(months, total, s1, s2, tmpdir):
+    # 이전 report.py의 generate_total_graph / generate_scope_graph 경로
+    total_path = os.path.join(tmpdir, "graph_total.png")
+    scope_path = os.path.join(tmpdir, "graph_scope.png")
+
+    plt.figure(figsize=(6, 3))
+    plt.bar(months, total)
+    plt.xlabel('Date')
+    plt.ylabel('Emissions (kgCO₂)')
+    plt.title('Total Emissions')
+    plt.xticks(rotation=90, fontsize=8)
+    plt.tight_layout()
+    plt.savefig(total_path)
+    plt.close()
+
+    x = range(len(months))
+    w = 0.35
+    plt.figure(figsize=(6, 3))
+    plt.bar([i - w / 2 for i in x], s1, w)
+    plt.bar([i + w / 2 for i in x], s2, w)
+    plt.xticks(x, months, rotation=90, fontsize=8)
+    plt.xlabel('Date')
+    plt.ylabel('Emissions (kgCO₂)')
+    plt.title('Scope 1 & 2 Emissions')
+    plt.legend(['Scope 1', 'Scope 2'])
+    plt.tight_layout()
+    plt.savefig(scope_path)
+    plt.close()
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    c.drawImage(ImageReader(total_path), 50, 500, width=500, height=160)
+    c.drawImage(ImageReader(scope_path), 50, 300, width=500, height=160)
+    c.save()
+    return buf.getvalue()
+
+
+def vector_page(months, total, s1, s2):
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    renderPDF.draw(total_chart(months, total), c, 50, 500)
+    renderPDF.draw(scope_chart(months, s1, s2), c, 50, 300)
+    c.save()
+    return buf.getvalue()
+
+
+def bench(fn, repeat):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, len(out)
+
+
+def main():
+    n_months = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    data = sample(n_months)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        mpl = bench(lambda: matplotlib_page(*data, tmpdir), repeat)
+    vec = bench(lambda: vector_page(*data), repeat)
+
+    print(f"months={n_months} repeat={repeat}")
+    print(f"{'path':<12}{'best ms':>10}{'pdf bytes':>12}")
+    print(f"{'matplotlib':<12}{mpl[0] * 1000:>10.1f}{mpl[1]:>12}")
+    print(f"{'vector':<12}{vec[0] * 1000:>10.1f}{vec[1]:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+월 키/복합 인덱스 실행 계획 검사와 조회 시간 측정 (임시 SQLite DB)
+
+    python -m benchmarks.bench_month_index [행 수]
+
+핫 쿼리가 전체 테이블 SCAN으로 실행되면 0이 아닌 코드로 끝난다.
+"""
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, select, text
+
+from app.db import Base
+from app import models  # noqa: F401  (테이블 등록)
+from app.models import EmissionRecord, EmissionRollup, ReportInfo
+
+USERS = 1000
+
+
+def _months(count):
+    years, months = np.divmod(np.arange(count), 12)
+    return (2000 + years) * 100 + months + 1
+
+
+def populate(conn, rows: int):
+    per_user = max(1, rows // USERS)
+    months = _months(per_user)
+    rng = np.random.default_rng(0)
+    for user_id in range(1, USERS + 1):
+        values = rng.random(per_user) * 1000
+        conn.execute(EmissionRecord.__table__.insert(), [
+            {"user_id": user_id, "company": f"C{user_id}", "month": int(m), "electricity": float(v),
+             "gasoline": 0.0, "natural_gas": 0.0, "district_heating": 0.0,
+             "scope1": 0.0, "scope2": float(v), "total_emission": float(v)}
+            for m, v in zip(months, values)
+        ])
+        cumulative = np.cumsum(values)
+        conn.execute(EmissionRollup.__table__.insert(), [
+            {"user_id": user_id, "month": int(m), "total": float(v), "scope1": 0.0, "scope2": float(v),
+             "cum_total": float(c), "cum_scope1": 0.0, "cum_scope2": float(c)}
+            for m, v, c in zip(months, values, cumulative)
+        ])
+        conn.execute(ReportInfo.__table__.insert(), [
+            {"user_id": user_id, "company": f"C{user_id}", "start_month": int(months[0]),
+             "end_month": int(months[-1]), "allowance": 1000.0}
+            for _ in range(3)
+        ])
+    return months
+
+
+def hot_queries(user_id: int, start: int, end: int):
+    return {
+        "records_range": select(EmissionRecord.month, EmissionRecord.total_emission)
+        .where(EmissionRecord.user_id == user_id, EmissionRecord.month.between(start, end))
+        .order_by(EmissionRecord.month),
+        "latest_report_info": select(ReportInfo)
+        .where(ReportInfo.user_id == user_id)
+        .order_by(ReportInfo.id.desc())
+        .limit(1),
+        "rollup_through": select(EmissionRollup.cum_total)
+        .where(EmissionRollup.user_id == user_id, EmissionRollup.month <= end)
+        .order_by(EmissionRollup.month.desc())
+        .limit(1),
+    }
+
+
+def query_plan(conn, stmt) -> list:
+    sql = str(stmt.compile(conn, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+
+
+def full_scan(plan: list) -> bool:
+    # 'SCAN <table>'은 전체 스캔, 'SEARCH ... USING INDEX'는 인덱스 범위 조회
+    return any(step.startswith("SCAN") and "USING" not in step for step in plan)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        t = time.perf_counter()
+        with engine.begin() as conn:
+            months = populate(conn, rows)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+        load_seconds = time.perf_counter() - t
+
+        start, end = int(months[len(months) // 4]), int(months[len(months) // 2])
+        result, failed = {}, []
+        with engine.connect() as conn:
+            for name, stmt in hot_queries(USERS // 2, start, end).items():
+                plan = query_plan(conn, stmt)
+                if full_scan(plan):
+                    failed.append(name)
+                timings = []
+                for user_id in range(1, USERS + 1, USERS // 50):
+                    stmt = hot_queries(user_id, start, end)[name]
+                    t = time.perf_counter()
+                    conn.execute(stmt).all()
+                    timings.append(time.perf_counter() - t)
+                result[name] = {
+                    "plan": plan,
+                    "median_ms": round(statistics.median(timings) * 1000, 3),
+                    "max_ms": round(max(timings) * 1000, 3),
+                }
+        engine.dispose()
+
+    print(json.dumps({
+        "rows": len(months) * USERS,
+        "load_seconds": round(load_seconds, 1),
+        "queries": result,
+        "full_scans": failed,
+    }, indent=2, ensure_ascii=False))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+보고서 PDF 조판(platypus) 시간과 메모리: 기간 길이(개월 수)별로 본다
+
+    python -m benchmarks.bench_report_pdf [최대 연수] [반복 횟수]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+
+from app.report_builder import ensure_font, _draw_pdf, _table_row, FONT_NAME
+from app.charts import total_chart, scope_chart
+
+Record = namedtuple("Record", "month company scope1 scope2 total_emission")
+Info = namedtuple("Info", "company start_month end_month allowance")
+
+FEEDBACK = "월별 배출량이 계절에 따라 크게 달라집니다. " * 60
+
+
+def sample(n_months):
+    records = []
+    for i in range(n_months):
+        s1, s2 = 100 + (i * 37) % 50, 300 + (i * 53) % 120
+        records.append(Record((2000 + i // 12) * 100 + i % 12 + 1, "벤치사", float(s1), float(s2), float(s1 + s2)))
+    return records
+
+
+def render(records, path):
+    months = [f"{r.month // 100}-{r.month % 100:02d}" for r in records]
+    graph_total = total_chart(months, [r.total_emission for r in records], font_name=FONT_NAME)
+    graph_scope = scope_chart(months, [r.scope1 for r in records], [r.scope2 for r in records], font_name=FONT_NAME)
+    total = sum(r.total_emission for r in records)
+    _draw_pdf(path, Info("벤치사", records[0].month, records[-1].month, total), (months[0], months[-1]),
+              (sum(r.scope1 for r in records), sum(r.scope2 for r in records), total), 0.0,
+              {"months": []}, "기간 말 예측 없음", [_table_row(r) for r in records], graph_total, graph_scope, FEEDBACK)
+
+
+def bench(records, path, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render(records, path)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    render(records, path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, os.path.getsize(path)
+
+
+def main():
+    max_years = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    ensure_font()
+    print(f"{'years':>6}{'best ms':>10}{'peak MB':>10}{'pdf bytes':>12}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "report.pdf")
+        for years in sorted({1, 5, 10, max_years}):
+            best, peak, size = bench(sample(years * 12), path, repeat)
+            print(f"{years:>6}{best * 1000:>10.1f}{peak / 1e6:>10.1f}{size:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+app.main import 시간과 보고서 의존성 지연 로딩 여부 측정
+
+    python -m benchmarks.bench_startup [반복 횟수]
+"""
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["reportlab", "matplotlib", "openai", "app.report_builder"]
+
+PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - t
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    seconds = [r["seconds"] for r in runs]
+    print(json.dumps({
+        "import_app_main_ms": {
+            "median": round(statistics.median(seconds) * 1000, 1),
+            "min": round(min(seconds) * 1000, 1),
+            "max": round(max(seconds) * 1000, 1),
+        },
+        "heavy_modules_loaded": runs[-1]["loaded"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+전체 라우트 부하 테스트 (in-process ASGI, 임시 DB, OpenAI 대역)
+
+    python -m benchmarks.load_test [--users 20] [--years 3] [--rounds 3] [--concurrency 8]
+                                   [--llm-latency 0.2] [--baseline benchmarks/baseline.json]
+                                   [--save-baseline PATH] [--tolerance 0.25]
+
+가상 사용자마다 /auth/login -> /input-excel -> /previous -> /matching -> /report/generate 를 rounds번 돌고
+라우트별 p50/p95/p99 지연과 처리량을 JSON으로 출력한다. --baseline을 주면 p95가 tolerance 이상
+느려진 라우트를 표시하고 0이 아닌 코드로 끝난다. (httpx 필요)
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+from benchmarks import synthetic
+
+ROUTES = ["/auth/login", "/input-excel", "/previous", "/matching", "/report/generate"]
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _configure_env(workdir: str):
+    # app 모듈은 import 시점에 설정을 읽으므로 먼저 임시 DB/캐시 경로를 잡는다
+    db_path = os.path.join(workdir, "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ["REPORT_CACHE_DIR"] = os.path.join(workdir, "report_cache")
+    os.environ["FEEDBACK_BACKEND"] = "openai"
+    os.environ.setdefault("REPORT_PREWARM", "0")
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, route: str, request):
+        started = time.perf_counter()
+        res = await request
+        self.samples[route].append(time.perf_counter() - started)
+        if res.status_code >= 400:
+            self.errors[route] += 1
+        return res
+
+    def summary(self, wall_seconds: float) -> dict:
+        routes = {}
+        for route in ROUTES:
+            ms = np.array(self.samples[route]) * 1000
+            if not len(ms):
+                continue
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            routes[route] = {
+                "count": len(ms),
+                "errors": self.errors[route],
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "mean_ms": round(float(ms.mean()), 2),
+                "rps": round(len(ms) / wall_seconds, 2),
+            }
+        total = sum(len(v) for v in self.samples.values())
+        return {"routes": routes, "requests": total, "wall_seconds": round(wall_seconds, 2),
+                "throughput_rps": round(total / wall_seconds, 2)}
+
+
+async def _register(client, users):
+    for email, password, industry, _ in users:
+        await client.post("/auth/register", data={"email": email, "password": password, "industry": industry})
+
+
+def _client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+async def _virtual_user(app, index, user, args, recorder):
+    email, password, _, company = user
+    workbook = synthetic.excel_bytes(synthetic.monthly_frame(args.years, seed=index))
+    async with _client(app) as client:
+        for round_no in range(args.rounds):
+            start, end = synthetic.report_period(args.years, seed=index * 1000 + round_no)
+            await recorder.call("/auth/login", client.post("/auth/login", data={"email": email, "password": password}))
+            await recorder.call("/input-excel", client.post(
+                "/input-excel",
+                files={"file": ("bench.xlsx", workbook, XLSX)},
+                data={"company": company, "start_month": start, "end_month": end, "allowance": "500000"},
+            ))
+            await recorder.call("/previous", client.post(
+                "/previous", data={"start_month": start, "end_month": end, "allowance": "500000"}
+            ))
+            await recorder.call("/matching", client.get("/matching"))
+            await recorder.call("/report/generate", client.get("/report/generate"))
+
+
+async def run(args) -> dict:
+    from app.main import app
+    from benchmarks import stub_openai
+
+    stub = stub_openai.install(latency=args.llm_latency)
+    users = synthetic.users(args.users)
+    recorder = Recorder()
+    async with app.router.lifespan_context(app):
+        async with _client(app) as client:
+            await _register(client, users)
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def limited(i, user):
+            async with semaphore:
+                await _virtual_user(app, i, user, args, recorder)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(limited(i, u) for i, u in enumerate(users)))
+        wall = time.perf_counter() - started
+
+    result = recorder.summary(wall)
+    result["config"] = {
+        "users": args.users, "years": args.years, "rounds": args.rounds,
+        "concurrency": args.concurrency, "llm_latency": args.llm_latency,
+    }
+    result["llm_calls"] = stub.chat.completions.calls
+    return result
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list:
+    """p95가 baseline보다 tolerance 비율 이상 느려진 라우트 목록"""
+    regressions = []
+    for route, stats in result["routes"].items():
+        base = baseline.get("routes", {}).get(route)
+        if not base:
+            continue
+        if stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append({"route": route, "p95_ms": stats["p95_ms"], "baseline_p95_ms": base["p95_ms"]})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--baseline")
+    parser.add_argument("--save-baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure_env(workdir)
+        result = asyncio.run(run(args))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            result["regressions"] = compare(result, json.load(f), args.tolerance)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"config": result["config"], "routes": result["routes"]}, f, indent=2, ensure_ascii=False)
+    if result.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+OpenAI 클라이언트 대역. chat.completions.create만 흉내 내고 지정한 지연 뒤 결정적인 응답을 돌려준다.
+OpenAIBackend에 그대로 꽂아 넣어 메시지 구성/캐시/타임아웃 경로를 네트워크 없이 측정한다.
+"""
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+from app.feedback import OpenAIBackend, feedback_service
+
+
+class _Completions:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def create(self, model, messages, **kwargs):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        digest = hashlib.sha256(messages[-1]["content"].encode()).hexdigest()[:8]
+        content = f"[{model} {digest}] 배출량 추이를 점검하고 Scope별 감축 방안을 검토하세요.\\n"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class StubOpenAIClient:
+    def __init__(self, latency: float = 0.0):
+        self.chat = SimpleNamespace(completions=_Completions(latency))
+
+
+def install(latency: float = 0.0, model: str = "gpt-3.5-turbo") -> StubOpenAIClient:
+    """feedback_service가 대역 클라이언트를 쓰는 OpenAIBackend를 사용하도록 바꾼다."""
+    client = StubOpenAIClient(latency)
+    backend = OpenAIBackend(model)
+    backend._client = client
+    feedback_service.set_backend(backend)
+    return client
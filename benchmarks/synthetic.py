@@ -0,0 +1,47 @@
+"""벤치마크용 합성 데이터: 사용자, 여러 해에 걸친 월별 엑셀 업로드, 보고서 기간"""
+import io
+
+import numpy as np
+import pandas as pd
+
+INDUSTRIES = ["제조", "IT", "물류", "유통", "건설"]
+HEADERS = ["month", "electricity (kWh)", "gasoline (L)", "natural_gas (m³)", "district_heating (GJ)"]
+
+
+def users(count: int, seed: int = 0):
+    """[(email, password, industry, company), ...]"""
+    rng = np.random.default_rng(seed)
+    return [
+        (f"bench{i}@example.com", "bench", INDUSTRIES[rng.integers(len(INDUSTRIES))], f"벤치{i}사")
+        for i in range(count)
+    ]
+
+
+def monthly_frame(years: int, seed: int = 0, start_year: int = 2020) -> pd.DataFrame:
+    """계절성이 있는 월별 활동량 시트"""
+    rng = np.random.default_rng(seed)
+    n = years * 12
+    season = 1 + 0.3 * np.cos(np.arange(n) * 2 * np.pi / 12)
+    scale = rng.uniform(0.5, 3.0)
+    return pd.DataFrame({
+        "month": pd.date_range(f"{start_year}-01-01", periods=n, freq="MS"),
+        "electricity (kWh)": np.round(scale * 12000 * season * rng.uniform(0.9, 1.1, n), 1),
+        "gasoline (L)": np.round(scale * 400 * rng.uniform(0.8, 1.2, n), 1),
+        "natural_gas (m³)": np.round(scale * 900 * season * rng.uniform(0.9, 1.1, n), 1),
+        "district_heating (GJ)": np.round(scale * 20 * season, 2),
+    }, columns=HEADERS)
+
+
+def excel_bytes(df: pd.DataFrame) -> bytes:
+    buf = io.BytesIO()
+    df.to_excel(buf, index=False)
+    return buf.getvalue()
+
+
+def report_period(years: int, seed: int = 0, start_year: int = 2020):
+    """업로드 범위 안의 임의 12개월 (start_month, end_month)"""
+    rng = np.random.default_rng(seed)
+    first = int(rng.integers(0, max(1, years * 12 - 11)))
+    start = pd.Timestamp(f"{start_year}-01-01") + pd.DateOffset(months=first)
+    end = start + pd.DateOffset(months=11)
+    return start.strftime("%Y-%m"), end.strftime("%Y-%m")
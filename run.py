@@ -1,10 +1,23 @@
+import argparse
+
 import uvicorn
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",   
-        host="127.0.0.1",
-        port=8000,
-        reload=True     
-    )
+    parser = argparse.ArgumentParser()
+    # 기본은 개발용 (reload, 로컬 전용). --prod는 여러 워커로 실행한다 (app/server.py)
+    parser.add_argument("--prod", action="store_true")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    args = parser.parse_args()
 
+    if args.prod:
+        from app.server import run
+        run(args.host, args.port, args.workers)
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host=args.host or "127.0.0.1",
+            port=args.port or 8000,
+            reload=True
+        )
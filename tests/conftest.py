@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import factors
+from app.db import Base
+from app.factors import seed_factors
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        seed_factors(conn)
+    factors.invalidate_cache()
+    yield engine
+    factors.invalidate_cache()
+    engine.dispose()
+
+
+@pytest.fixture
+def db(db_engine):
+    with sessionmaker(bind=db_engine, autoflush=False)() as session:
+        yield session
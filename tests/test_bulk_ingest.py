@@ -0,0 +1,46 @@
+from sqlalchemy import func, select
+
+from app.bulk_ingest import iter_parsed, parse_company, save_company
+from app.factors import get_factor_table
+from app.models import EmissionRecord, EmissionRollup
+
+HEADER = "month,electricity (kWh),gasoline (L),natural_gas (m³),district_heating (GJ)\n"
+
+
+def _csv(tmp_path, lines):
+    path = tmp_path / "company.csv"
+    path.write_text(HEADER + "".join(lines), encoding="utf-8")
+    return str(path)
+
+
+def test_parse_company_writes_one_pickle_per_chunk(db, tmp_path):
+    months = [f"{2020 + i // 12}-{i % 12 + 1:02d},{100 + i},10,5,1\n" for i in range(35)]
+    path = _csv(tmp_path, months + ["합계,1,1,1,1\n"])
+    out = str(tmp_path / "company.parsed")
+    parsed = parse_company(path, None, get_factor_table(db), out, chunk_rows=10)
+    assert (parsed["rows"], parsed["skipped"]) == (36, 1)
+    chunks = list(iter_parsed(out))
+    assert [len(c) for c in chunks] == [10, 10, 10, 5]
+    assert "total_emission" in chunks[0].columns
+
+    written, since = save_company(db, 1, "A", iter_parsed(out))
+    assert (written, since) == (35, 202001)
+    assert db.execute(select(func.count()).select_from(EmissionRecord)).scalar() == 35
+    assert db.execute(select(func.count()).select_from(EmissionRollup)).scalar() == 35
+
+
+def test_parse_company_rejects_missing_columns(db, tmp_path):
+    path = tmp_path / "company.csv"
+    path.write_text("month,electricity (kWh)\n2024-01,1\n", encoding="utf-8")
+    parsed = parse_company(str(path), None, get_factor_table(db), str(tmp_path / "out"))
+    assert parsed["error"].startswith("필수 컬럼이 없습니다")
+
+
+def test_duplicate_month_in_a_later_chunk_wins(db, tmp_path):
+    path = _csv(tmp_path, ["2024-01,100,0,0,0\n", "2024-02,100,0,0,0\n", "2024-01,300,0,0,0\n"])
+    out = str(tmp_path / "company.parsed")
+    parse_company(path, None, get_factor_table(db), out, chunk_rows=2)
+    save_company(db, 1, "A", iter_parsed(out))
+    value = db.execute(select(EmissionRecord.electricity).where(EmissionRecord.month == 202401)).scalar()
+    assert value == 300
+
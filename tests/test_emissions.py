@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+from app.emissions import ACTIVITY_COLUMNS, changed_rows, load_existing, prepare_frame, save_upload
+from app.models import EmissionRecord
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=["month"] + ACTIVITY_COLUMNS)
+
+
+def _sheet(rows):
+    return pd.DataFrame(rows, columns=[
+        "month", "electricity (kWh)", "gasoline (L)", "natural_gas (m³)", "district_heating (GJ)",
+    ])
+
+
+def test_unchanged_rows_are_skipped():
+    df = _frame([(202401, 100.0, 10.0, 5.0, 1.0), (202402, 120.0, 12.0, 6.0, 1.5)])
+    assert changed_rows(df, df.copy()).empty
+
+
+def test_changes_below_a_cent_are_ignored():
+    existing = _frame([(202401, 100.001, 10.0, 5.0, 1.0)])
+    df = _frame([(202401, 100.004, 10.0, 5.0, 1.0)])
+    assert changed_rows(df, existing).empty
+
+
+def test_changes_of_a_cent_are_kept():
+    existing = _frame([(202401, 100.0, 10.0, 5.0, 1.0), (202402, 120.0, 12.0, 6.0, 1.5)])
+    df = _frame([(202401, 100.0, 10.0, 5.0, 1.0), (202402, 120.0, 12.01, 6.0, 1.5)])
+    assert changed_rows(df, existing)["month"].tolist() == [202402]
+
+
+def test_new_months_are_changed():
+    existing = _frame([(202401, 100.0, 10.0, 5.0, 1.0)])
+    df = _frame([(202401, 100.0, 10.0, 5.0, 1.0), (202402, 100.0, 10.0, 5.0, 1.0)])
+    assert changed_rows(df, existing)["month"].tolist() == [202402]
+
+
+def test_prepare_frame_keeps_last_duplicate_month_and_drops_bad_months():
+    df = prepare_frame(_sheet([
+        ("2024-01", 1, 0, 0, 0), ("2024-01", 2, 0, 0, 0), ("합계", 3, 0, 0, 0), ("2024-02", 4, 0, 0, 0),
+    ]))
+    assert df["month"].tolist() == [202401, 202402]
+    assert df["electricity"].tolist() == [2.0, 4.0]
+
+
+def test_save_upload_inserts_only_new_and_changed_months(db):
+    first = _sheet([("2024-01", 100, 10, 5, 1), ("2024-02", 120, 12, 6, 1.5)])
+    assert save_upload(db, 1, "A", first) == (2, 202401)
+
+    assert save_upload(db, 1, "A", first) == (0, None)
+
+    second = _sheet([("2024-01", 100, 10, 5, 1), ("2024-02", 130, 12, 6, 1.5), ("2024-03", 90, 9, 4, 1)])
+    assert save_upload(db, 1, "A", second) == (2, 202402)
+
+    stored = load_existing(db, 1, "A").sort_values("month")
+    assert stored["month"].tolist() == [202401, 202402, 202403]
+    assert stored["electricity"].tolist() == [100.0, 130.0, 90.0]
+
+
+def test_save_upload_computes_scopes(db):
+    save_upload(db, 1, "A", _sheet([("2024-01", 1000, 100, 0, 0)]))
+    record = db.query(EmissionRecord).one()
+    assert record.scope1 == pytest.approx(231.0)
+    assert record.scope2 == pytest.approx(417.0)
+    assert record.total_emission == pytest.approx(648.0)
+
+
+def test_blank_cells_do_not_count_as_changes(db):
+    sheet = _sheet([("2024-01", 100, None, 5, 1)])
+    assert save_upload(db, 1, "A", sheet)[0] == 1
+    assert save_upload(db, 1, "A", sheet) == (0, None)
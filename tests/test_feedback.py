@@ -0,0 +1,64 @@
+import threading
+
+from app import feedback
+from app.feedback import CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def _breaker(monkeypatch, max_failures=2, reset_after=30.0):
+    clock = Clock()
+    monkeypatch.setattr(feedback.time, "monotonic", clock.monotonic)
+    return CircuitBreaker(max_failures, reset_after), clock
+
+
+def test_opens_after_max_failures(monkeypatch):
+    breaker, _ = _breaker(monkeypatch)
+    breaker.failure()
+    assert breaker.allow()
+    breaker.failure()
+    assert not breaker.allow()
+
+
+def test_half_open_allows_exactly_one_trial(monkeypatch):
+    breaker, clock = _breaker(monkeypatch)
+    breaker.failure()
+    breaker.failure()
+    clock.now += 31
+    allowed = []
+    threads = [threading.Thread(target=lambda: allowed.append(breaker.allow())) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert allowed.count(True) == 1
+
+
+def test_trial_failure_reopens(monkeypatch):
+    breaker, clock = _breaker(monkeypatch)
+    breaker.failure()
+    breaker.failure()
+    clock.now += 31
+    assert breaker.allow()
+    breaker.failure()
+    assert not breaker.allow()
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 2
+    assert breaker.allow()
+
+
+def test_trial_success_closes(monkeypatch):
+    breaker, clock = _breaker(monkeypatch)
+    breaker.failure()
+    breaker.failure()
+    clock.now += 31
+    assert breaker.allow()
+    breaker.success()
+    assert all(breaker.allow() for _ in range(5))
@@ -0,0 +1,82 @@
+import numpy as np
+
+from app.forecast import fit_forecasts
+
+
+def _months(start_year, count):
+    return [(start_year + i // 12) * 100 + i % 12 + 1 for i in range(count)]
+
+
+def test_one_observation_has_no_interval():
+    result = fit_forecasts([(1, 10, 202401, 202412, 1000.0)], [(1, 202401, 50.0)], 36, 0.9)[1]
+    assert result["months_ahead"] == 11
+    assert result["projected_total"] == 600.0
+    assert result["projected_balance"] == 400.0
+    for key in ("total_lower", "total_upper", "balance_lower", "balance_upper"):
+        assert result[key] is None
+
+
+def test_full_period_needs_no_projection():
+    rollups = [(1, m, 10.0) for m in _months(2024, 12)]
+    result = fit_forecasts([(1, 10, 202401, 202412, 200.0)], rollups, 36, 0.9)[1]
+    assert result["months_ahead"] == 0
+    assert result["projected_total"] == result["total_lower"] == result["total_upper"] == 120.0
+    assert result["projected_balance"] == 80.0
+
+
+def test_trend_and_season_are_recovered():
+    months = _months(2022, 30)   # 2022-01 ~ 2024-06
+    values = [100 + 2 * i + 20 * np.cos(2 * np.pi * (m % 100 - 1) / 12) for i, m in enumerate(months)]
+    rng = np.random.default_rng(0)
+    noisy = [v + rng.normal(0, 1) for v in values]
+    result = fit_forecasts([(1, 10, 202401, 202412, 0.0)], [(1, m, v) for m, v in zip(months, noisy)], 36, 0.9)[1]
+
+    future = [100 + 2 * i + 20 * np.cos(2 * np.pi * (i % 12) / 12) for i in range(30, 36)]
+    expected = sum(noisy[24:]) + sum(future)
+    assert result["as_of"] == "2024-06"
+    assert abs(result["projected_total"] - expected) < 10
+    assert result["total_lower"] < result["projected_total"] < result["total_upper"]
+    assert result["total_lower"] <= expected <= result["total_upper"]
+
+
+def test_users_are_fit_independently_in_one_batch():
+    reports = [(1, 10, 202401, 202412, 0.0), (2, 20, 202401, 202412, 0.0), (3, 30, 202401, 202412, 0.0)]
+    rollups = [(1, m, 10.0) for m in _months(2023, 18)] + [(2, m, 1000.0) for m in _months(2023, 20)]
+    results = fit_forecasts(reports, rollups, 36, 0.9)
+    assert set(results) == {1, 2}   # 기록이 없는 사용자는 빠진다
+    assert abs(results[1]["projected_total"] - 120.0) < 1
+    assert abs(results[2]["projected_total"] - 12000.0) < 10
+    alone = fit_forecasts(reports[:1], [r for r in rollups if r[0] == 1], 36, 0.9)[1]
+    assert alone == results[1]
+
+
+def test_months_past_period_end_are_ignored():
+    rollups = [(1, m, 10.0) for m in _months(2024, 18)]
+    result = fit_forecasts([(1, 10, 202401, 202406, 100.0)], rollups, 36, 0.9)[1]
+    assert result["as_of"] == "2024-06"
+    assert result["actual"] == 60.0 and result["months_ahead"] == 0
+
+
+def test_far_period_end_is_flagged_partial():
+    rollups = [(1, m, 10.0) for m in _months(2024, 12)]
+    # 기준 시점 2024-12에서 기간 끝 2040-12까지 192개월, 예측은 120개월(2034-12)까지만 한다
+    result = fit_forecasts([(1, 10, 202401, 204012, 0.0)], rollups, 36, 0.9)[1]
+    assert result["partial"] is True
+    assert result["projected_through"] == "2034-12"
+    assert result["months_ahead"] == 120 and result["months_unprojected"] == 72
+    assert abs(result["projected_total"] - 120.0 - 1200.0) < 1
+
+
+def test_period_within_horizon_is_not_partial():
+    rollups = [(1, m, 10.0) for m in _months(2024, 12)]
+    result = fit_forecasts([(1, 10, 202401, 203412, 0.0)], rollups, 36, 0.9)[1]
+    assert result["partial"] is False and result["months_unprojected"] == 0
+    assert result["projected_through"] == "2034-12"
+
+
+def test_period_starting_past_horizon_is_partial():
+    rollups = [(1, m, 10.0) for m in _months(2024, 12)]
+    result = fit_forecasts([(1, 10, 203601, 203612, 0.0)], rollups, 36, 0.9)[1]
+    assert result["partial"] is True
+    assert result["months_ahead"] == 0 and result["months_unprojected"] == 12
+    assert result["projected_total"] == 0.0
@@ -0,0 +1,59 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import ingest
+from app.models import EmissionRecord, ReportBalance, ReportInfo
+
+HEADER = "month,electricity (kWh),gasoline (L),natural_gas (m³),district_heating (GJ)\n"
+REPORT = {"start_month": 202401, "end_month": 202412, "allowance": 1000.0}
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    def write(text):
+        path = tmp_path / "upload.csv"
+        path.write_text(text, encoding="utf-8")
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def sessions(db_engine, monkeypatch):
+    maker = sessionmaker(bind=db_engine, autoflush=False)
+    monkeypatch.setattr(ingest, "SessionLocal", maker)
+    return maker
+
+
+def _count(maker, model):
+    with maker() as db:
+        return db.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_missing_columns_are_rejected_with_400(db, csv_file):
+    path = csv_file("month,electricity (kWh)\n2024-01,100\n")
+    with pytest.raises(HTTPException) as e:
+        ingest.ingest_path(db, path, 1, "A", chunk_rows=10)
+    assert e.value.status_code == 400
+    assert "gasoline" in e.value.detail
+
+
+def test_records_and_report_are_committed_together(sessions, csv_file):
+    path = csv_file(HEADER + "2024-01,100,10,5,1\n2024-02,120,12,6,1.5\n")
+    stats = ingest._ingest_committed(path, 1, "A", REPORT, 1)
+    assert stats["rows"] == stats["written"] == 2
+    assert _count(sessions, EmissionRecord) == 2
+    assert _count(sessions, ReportInfo) == 1
+    assert _count(sessions, ReportBalance) == 1
+
+
+def test_failed_report_step_rolls_back_records(sessions, csv_file, monkeypatch):
+    def broken(db, user_id=None):
+        raise RuntimeError("balance refresh failed")
+    monkeypatch.setattr(ingest, "refresh_balances", broken)
+    path = csv_file(HEADER + "2024-01,100,10,5,1\n")
+    with pytest.raises(RuntimeError):
+        ingest._ingest_committed(path, 1, "A", REPORT, 1)
+    assert _count(sessions, EmissionRecord) == 0
+    assert _count(sessions, ReportInfo) == 0
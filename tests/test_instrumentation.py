@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app import instrumentation
+from app.instrumentation import QUERY_ERRORS, RequestStats, instrument_engine
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO t (id) VALUES (1)"))
+    yield engine
+    engine.dispose()
+
+
+def _errors(name):
+    return QUERY_ERRORS._values[(name,)]
+
+
+def test_failed_statements_do_not_leak_start_times(engine):
+    before = _errors("IntegrityError")
+    with engine.connect() as conn:
+        for _ in range(5):
+            with pytest.raises(IntegrityError):
+                conn.execute(text("INSERT INTO t (id) VALUES (1)"))
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing"))
+        conn.execute(text("SELECT 1"))
+        assert conn.info["query_started"] == []
+    assert _errors("IntegrityError") == before + 5
+    assert "db_query_errors_total" in instrumentation.render_metrics()
+
+
+def test_failed_statements_count_toward_the_request(engine):
+    stats = RequestStats()
+    token = instrumentation._current.set(stats)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT id FROM t"))
+            with pytest.raises(IntegrityError):
+                conn.execute(text("INSERT INTO t (id) VALUES (1)"))
+    finally:
+        instrumentation._current.reset(token)
+    assert stats.queries == 2
+    assert stats.statements["INSERT INTO t (id) VALUES (1)"] == 1
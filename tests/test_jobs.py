@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+
+from app.jobs import DONE, FAILED, JobQueue, QueueFull
+from app.models import ReportJob
+
+
+@pytest.fixture
+def queues(db_engine):
+    # 같은 DB를 쓰는 두 워커 프로세스를 흉내 낸다
+    maker = sessionmaker(bind=db_engine)
+    made = [JobQueue(1, 2, history=3, session_factory=maker) for _ in range(2)]
+    # 두 번째 큐는 다른 pid의 워커로 보이게 한다 (살아 있는지는 첫 번째 큐의 실제 pid로 확인된다)
+    made[1]._pid = lambda: os.getpid() + 1_000_000
+    yield made
+    for q in made:
+        q.shutdown()
+
+
+def _finish(queue, job):
+    job.future.result(timeout=5)
+    return queue.get(job.id)
+
+
+def test_job_state_is_visible_to_other_workers(queues):
+    a, b = queues
+    job = a.submit(1, lambda x: {"value": x}, 42)
+    _finish(a, job)
+    seen = b.get(job.id)
+    assert seen.status == DONE
+    assert seen.result == {"value": 42}
+    assert seen.future is None
+
+
+def test_failed_job_keeps_error_status(queues):
+    a, b = queues
+
+    def fail():
+        raise HTTPException(status_code=404, detail="없음")
+
+    job = a.submit(1, fail)
+    _finish(a, job)
+    seen = b.get(job.id)
+    assert (seen.status, seen.error, seen.error_status) == (FAILED, "없음", 404)
+
+
+def test_one_active_job_per_user_across_workers(queues):
+    a, b = queues
+    release = threading.Event()
+    job = a.submit(1, release.wait, 5)
+    assert b.submit(1, lambda: None).id == job.id
+    assert a.submit(1, lambda: None).id == job.id
+    release.set()
+    _finish(a, job)
+    assert b.submit(1, lambda: {}).id != job.id
+
+
+def test_queue_full(queues):
+    a, _ = queues
+    release = threading.Event()
+    jobs = [a.submit(user_id, release.wait, 5) for user_id in (1, 2)]
+    with pytest.raises(QueueFull):
+        a.submit(3, lambda: None)
+    release.set()
+    for job in jobs:
+        _finish(a, job)
+
+
+def test_job_of_a_dead_worker_expires(queues):
+    a, b = queues
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    with a._session() as db:
+        db.add(ReportJob(id="orphan", user_id=1, status="running", pid=dead.pid, created_at=time.time()))
+        db.commit()
+    seen = b.get("orphan")
+    assert seen.status == FAILED and seen.error_status == 503
+    job = b.submit(1, lambda: {})
+    assert job.id != "orphan"
+    _finish(b, job)
+
+
+def test_finished_jobs_are_pruned(queues):
+    a, _ = queues
+    ids = []
+    for user_id in range(5):
+        job = a.submit(user_id, lambda: {})
+        _finish(a, job)
+        ids.append(job.id)
+        time.sleep(0.01)
+    assert [a.get(i) is not None for i in ids] == [False, False, True, True, True]
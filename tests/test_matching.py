@@ -0,0 +1,96 @@
+import datetime
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app import matching
+from app.matching import MatchingEngine, SURPLUS, DEFICIT
+
+NOW = datetime.datetime(2024, 1, 1)
+
+
+def _row(user_id, difference, industry="제조", report_id=None):
+    return SimpleNamespace(
+        user_id=user_id, report_id=report_id or user_id, email=f"u{user_id}@x.com",
+        company=f"C{user_id}", industry=industry, difference=difference, updated_at=NOW,
+    )
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    rows = []
+    monkeypatch.setattr(matching, "load_balances", lambda db, since=None: list(rows))
+    eng = MatchingEngine(overlap_seconds=0, full_sync_seconds=3600)
+    eng.rows = rows
+    return eng
+
+
+def test_counterparties_same_industry_first_then_largest(engine):
+    engine.rows[:] = [
+        _row(1, -50.0, "제조"),
+        _row(2, 10.0, "제조"), _row(3, 30.0, "제조"),
+        _row(4, 100.0, "IT"), _row(5, -5.0, "IT"),
+    ]
+    engine.sync(None)
+    page, total = engine.counterparties(SURPLUS, "제조", 1)
+    assert [p["id"] for p in page] == [3, 2, 4]
+    assert total == 3
+    page, total = engine.counterparties(DEFICIT, "제조", 1)
+    assert [p["id"] for p in page] == [5] and total == 1
+
+
+def test_counterparties_paging(engine):
+    engine.rows[:] = [_row(1, -1.0)] + [_row(i, float(i)) for i in range(2, 12)]
+    engine.sync(None)
+    page, total = engine.counterparties(SURPLUS, "제조", 1, offset=3, limit=4)
+    assert [p["id"] for p in page] == [8, 7, 6, 5]
+    assert total == 10
+
+
+def test_incremental_sync_replaces_old_entry(engine):
+    engine.rows[:] = [_row(1, -10.0), _row(2, 5.0), _row(3, 8.0)]
+    engine.sync(None)
+    # 2번의 여유분이 부족으로 바뀌면 여유 목록에서 빠진다
+    engine.rows[:] = [_row(2, -3.0)]
+    assert engine.sync(None) == 1
+    page, total = engine.counterparties(SURPLUS, "제조", 1)
+    assert [p["id"] for p in page] == [3] and total == 1
+
+
+def test_pairing_fills_gap_greedily(engine):
+    engine.rows[:] = [_row(1, -25.0), _row(2, 10.0), _row(3, 20.0), _row(4, 5.0)]
+    engine.sync(None)
+    result = engine.pairing(1)
+    assert [(p["id"], p["amount"]) for p in result["pairs"]] == [(3, 20.0), (2, 5.0)]
+    assert result["uncovered"] == 0.0
+
+
+def test_pairing_reports_uncovered(engine):
+    engine.rows[:] = [_row(1, -100.0), _row(2, 30.0)]
+    engine.sync(None)
+    result = engine.pairing(1)
+    assert [p["amount"] for p in result["pairs"]] == [30.0]
+    assert result["uncovered"] == 70.0
+
+
+def test_pairing_never_adds_zero_amounts(engine):
+    rng = random.Random(0)
+    for trial in range(200):
+        engine.rows[:] = [_row(1, -round(rng.uniform(1, 500), 2))] + [
+            _row(i, round(rng.uniform(0.01, 100), 2)) for i in range(2, 40)
+        ]
+        fresh = MatchingEngine(overlap_seconds=0, full_sync_seconds=3600)
+        fresh.sync(None)
+        result = fresh.pairing(1)
+        assert all(p["amount"] > 0 for p in result["pairs"]), trial
+        covered = round(sum(p["amount"] for p in result["pairs"]) + result["uncovered"], 2)
+        assert covered == abs(engine.rows[0].difference)
+
+
+def test_pairing_with_fractional_remainder(engine):
+    engine.rows[:] = [_row(1, -100.004)] + [_row(i, 50.0) for i in range(2, 10)]
+    engine.sync(None)
+    result = engine.pairing(1)
+    assert [p["id"] for p in result["pairs"]] == [2, 3]
+    assert result["uncovered"] == 0.0
@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import factors
+from app.db import Base
+from app.migrations import MigrationError, run_migrations
+
+# 정수 월 키 이전(기준 커밋)의 스키마. 월은 문자열로 저장되어 있었다
+BASELINE_SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR NOT NULL UNIQUE, password VARCHAR NOT NULL, "
+    "industry VARCHAR)",
+    "CREATE TABLE emissions (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users (id), "
+    "scope INTEGER NOT NULL, amount FLOAT NOT NULL, timestamp DATETIME)",
+    "CREATE TABLE emission_records (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users (id), "
+    "company VARCHAR NOT NULL, month VARCHAR, electricity FLOAT, gasoline FLOAT, natural_gas FLOAT, "
+    "district_heating FLOAT, total_emission FLOAT)",
+    "CREATE INDEX ix_emission_records_month ON emission_records (month)",
+    "CREATE TABLE report_info (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users (id), company VARCHAR, "
+    "start_month VARCHAR, end_month VARCHAR, allowance FLOAT)",
+]
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for ddl in BASELINE_SCHEMA:
+            conn.execute(text(ddl))
+        conn.execute(text("INSERT INTO users (id, email, password, industry) VALUES (1, 'a@x.com', 'x', '제조')"))
+        conn.execute(text(
+            "INSERT INTO report_info (user_id, company, start_month, end_month, allowance) "
+            "VALUES (1, 'A', '2024-01', '2024-12', 5000)"
+        ))
+    factors.invalidate_cache()
+    yield engine
+    factors.invalidate_cache()
+    engine.dispose()
+
+
+def _add_records(engine, months):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO emission_records (user_id, company, month, electricity, gasoline, natural_gas, "
+            "district_heating, total_emission) VALUES (1, 'A', :month, 100, 10, 0, 0, 64.8)"
+        ), [{"month": m} for m in months])
+
+
+def _prepare(engine):
+    # app.main.prepare와 같은 순서
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+
+def _column_type(conn, table, column):
+    return next(row[2] for row in conn.execute(text(f"PRAGMA table_info({table})")) if row[1] == column)
+
+
+def test_string_months_become_integer_keys(legacy_engine):
+    _add_records(legacy_engine, ["2024-01", "2024-02-15", "202403", "2024-4", "2024/05"])
+    _prepare(legacy_engine)
+    with legacy_engine.connect() as conn:
+        assert _column_type(conn, "emission_records", "month") == "INTEGER"
+        months = conn.execute(text("SELECT month, typeof(month) FROM emission_records ORDER BY month")).all()
+        assert months == [(m, "integer") for m in (202401, 202402, 202403, 202404, 202405)]
+        report = conn.execute(text("SELECT start_month, end_month FROM report_info")).one()
+        assert tuple(report) == (202401, 202412)
+        rollups = conn.execute(text("SELECT month, cum_total FROM emission_rollups ORDER BY month")).all()
+        assert [r.month for r in rollups] == [202401, 202402, 202403, 202404, 202405]
+        assert rollups[-1].cum_total == pytest.approx(5 * 64.8)
+        indexes = set(conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'emission_records'"
+        )).scalars())
+        assert {"uq_emission_user_company_month", "ix_emission_user_month"} <= indexes
+
+    # 다시 실행해도 아무것도 바뀌지 않는다
+    _prepare(legacy_engine)
+
+
+def test_unparseable_month_stops_the_migration(legacy_engine):
+    _add_records(legacy_engine, ["2024-01", "합계"])
+    with pytest.raises(MigrationError, match="합계"):
+        _prepare(legacy_engine)
+    with legacy_engine.connect() as conn:
+        # 트랜잭션이 롤백되어 옛 스키마와 값이 그대로 남는다
+        assert _column_type(conn, "emission_records", "month") == "VARCHAR"
+        assert sorted(conn.execute(text("SELECT month FROM emission_records")).scalars()) == ["2024-01", "합계"]
+        assert conn.execute(text("SELECT COUNT(*) FROM schema_migrations")).scalar() == 0
+
+
+def test_strings_mapping_to_the_same_key_stop_the_migration(legacy_engine):
+    _add_records(legacy_engine, ["2024-03", "2024-03-01", "2024-04"])
+    with pytest.raises(MigrationError, match="2024-03-01") as e:
+        _prepare(legacy_engine)
+    assert "month=202403" in str(e.value)
+    with legacy_engine.connect() as conn:
+        assert _column_type(conn, "emission_records", "month") == "VARCHAR"
+        assert conn.execute(text("SELECT COUNT(*) FROM emission_records")).scalar() == 3
@@ -0,0 +1,47 @@
+import datetime
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from app.months import form_month, month_key, month_keys, month_label
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-03", 202403),
+    ("2024-03-15", 202403),
+    ("2024/3", 202403),
+    ("202403", 202403),
+    (" 2024-12 ", 202412),
+    (datetime.date(2024, 3, 15), 202403),
+    (datetime.datetime(2024, 3, 15, 9, 30), 202403),
+    (pd.Timestamp("2024-03-01"), 202403),
+    (202403, 202403),
+])
+def test_month_key(value, expected):
+    assert month_key(value) == expected
+
+
+@pytest.mark.parametrize("value", ["2024-13", "2024-00", "합계", "", "24-03"])
+def test_month_key_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        month_key(value)
+
+
+def test_month_keys_marks_invalid_as_na():
+    keys = month_keys(pd.Series(["2024-01", "합계", None, "2024-02-28", "2024-13"]))
+    assert str(keys.dtype) == "Int64"
+    assert keys.tolist()[0] == 202401 and keys.tolist()[3] == 202402
+    assert keys.isna().tolist() == [False, True, True, False, True]
+
+
+def test_month_label_round_trip():
+    assert month_label(202403) == "2024-03"
+    assert month_key(month_label(199912)) == 199912
+
+
+def test_form_month_returns_400():
+    assert form_month("2024-05") == 202405
+    with pytest.raises(HTTPException) as e:
+        form_month("5월")
+    assert e.value.status_code == 400
@@ -0,0 +1,44 @@
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.process_pool import ProcessPool
+
+
+def _crash_once(marker: str) -> int:
+    # 처음 부르면 OOM kill처럼 작업 프로세스가 갑자기 끝난다
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return os.getpid()
+
+
+def _always_crash():
+    os._exit(1)
+
+
+@pytest.fixture
+def pool():
+    pool = ProcessPool(1, name="test")
+    yield pool
+    pool.shutdown()
+
+
+def test_broken_pool_is_replaced_and_the_call_retried(pool, tmp_path):
+    marker = str(tmp_path / "crashed")
+    first = pool.get()
+    assert asyncio.run(pool.run(_crash_once, marker)) != os.getpid()
+    assert pool.get() is not first
+    # 새 풀은 다음 호출에도 그대로 쓰인다
+    second = pool.get()
+    asyncio.run(pool.run(_crash_once, marker))
+    assert pool.get() is second
+
+
+def test_a_call_that_keeps_crashing_fails_once_retried(pool):
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(pool.run(_always_crash))
+    # 깨진 풀은 다음 호출에서 다시 만들어진다
+    assert asyncio.run(pool.run(os.getpid)) != os.getpid()
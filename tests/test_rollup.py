@@ -0,0 +1,102 @@
+import json
+import random
+
+import pandas as pd
+import pytest
+from sqlalchemy import func, select
+
+from app.analytics import rebuild_sketches
+from app.emissions import save_upload
+from app.factors import set_factor
+from app.models import EmissionRecord, IndustrySketch, User
+from app.rollup import period_sums, rebuild_rollup
+
+COLUMNS = ["month", "electricity (kWh)", "gasoline (L)", "natural_gas (m³)", "district_heating (GJ)"]
+MONTHS = [y * 100 + m for y in (2023, 2024) for m in range(1, 13)]
+
+
+def _upload(db, user_id, company, months, rng):
+    rows = [(f"{m // 100}-{m % 100:02d}", *(round(rng.uniform(0, 500), 2) for _ in range(4))) for m in months]
+    written, since = save_upload(db, user_id, company, pd.DataFrame(rows, columns=COLUMNS))
+    if since is not None:
+        rebuild_rollup(db, user_id, since)
+
+
+def _direct_sums(db, user_id, start, end):
+    row = db.execute(
+        select(
+            func.coalesce(func.sum(EmissionRecord.total_emission), 0.0),
+            func.coalesce(func.sum(EmissionRecord.scope1), 0.0),
+            func.coalesce(func.sum(EmissionRecord.scope2), 0.0),
+        ).where(EmissionRecord.user_id == user_id, EmissionRecord.month.between(start, end))
+    ).one()
+    return dict(zip(["total", "scope1", "scope2"], row))
+
+
+def _sketch_rows(db):
+    rows = db.execute(select(
+        IndustrySketch.industry, IndustrySketch.month, IndustrySketch.metric,
+        IndustrySketch.count, IndustrySketch.zeros, IndustrySketch.bins,
+    )).all()
+    # 개수가 0이 된 버킷은 빼고 비교한다
+    return {
+        (r.industry, r.month, r.metric): (r.count, r.zeros, {k: v for k, v in json.loads(r.bins).items() if v})
+        for r in rows if r.count
+    }
+
+
+def _assert_periods_match(db, user_ids, rng):
+    periods = [(MONTHS[0], MONTHS[-1]), (202401, 202412), (202212, 202302), (202507, 202512)]
+    for _ in range(20):
+        a, b = sorted(rng.sample(MONTHS, 2))
+        periods.append((a, b))
+    for user_id in user_ids:
+        for start, end in periods:
+            expected = _direct_sums(db, user_id, start, end)
+            assert period_sums(db, user_id, start, end) == pytest.approx(expected, abs=0.01)
+
+
+@pytest.fixture
+def users(db):
+    db.add_all([User(id=1, email="a@x.com", password="x", industry="제조"),
+                User(id=2, email="b@x.com", password="x", industry="제조")])
+    db.flush()
+    return [1, 2]
+
+
+def test_period_sums_match_records_after_uploads(db, users):
+    rng = random.Random(0)
+    _upload(db, 1, "A", MONTHS[:18], rng)
+    _upload(db, 1, "B", MONTHS[6:], rng)
+    _upload(db, 2, "C", MONTHS[::2], rng)
+    _assert_periods_match(db, users, rng)
+
+    # 중간 달만 다시 올려도 그 뒤 누적합이 맞아야 한다
+    _upload(db, 1, "A", MONTHS[10:14], rng)
+    _assert_periods_match(db, users, rng)
+
+
+def test_period_sums_match_records_after_factor_change(db, users):
+    rng = random.Random(1)
+    _upload(db, 1, "A", MONTHS, rng)
+    _upload(db, 2, "C", MONTHS[5:], rng)
+    before = period_sums(db, 1, MONTHS[0], MONTHS[-1])
+
+    set_factor(db, "electricity", 0.5, 202407)
+    _assert_periods_match(db, users, rng)
+    assert period_sums(db, 1, MONTHS[0], MONTHS[-1])["scope2"] > before["scope2"]
+
+
+def test_incremental_sketch_updates_match_a_full_rebuild(db, users):
+    rng = random.Random(2)
+    _upload(db, 1, "A", MONTHS, rng)
+    _upload(db, 2, "C", MONTHS[3:], rng)
+    _upload(db, 1, "A", MONTHS[8:12], rng)
+    set_factor(db, "gasoline", 2.5, 202403)
+    incremental = _sketch_rows(db)
+    rebuild_sketches(db)
+    assert _sketch_rows(db) == incremental
+
+
+def test_period_without_records_is_zero(db, users):
+    assert period_sums(db, 1, 202401, 202412) == {"total": 0.0, "scope1": 0.0, "scope2": 0.0}